@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Synthetic templog generator for the benchmarks.
+
+Usage:
+    python benchmarks/generate_log.py OUT.csv --rows 1000000 --sensors 4
+    python benchmarks/generate_log.py OUT.bin --rows 1000000 --sensors 8 --format binary
+    python benchmarks/generate_log.py OUT.db --rows 1000000 --sensors 8 --format sqlite
+
+Rows are written in the same layout LogWriter produces (one row per
+sensor per tick, time-ordered), with slow sine drift plus noise so
+min/max and rollups have something to do. A fixed seed makes files
+reproducible.
+"""
+import os
+import sys
+import math
+import random
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import binary_log
+import sqlite_log
+from log_writer import CSV_TIME_FMT
+
+CHUNK_TICKS = 10000
+
+
+def sensor_ids(count):
+    return [f"28-Bench{i:04d}" for i in range(count)]
+
+
+def _append_csv(path, batch):
+    # One strftime per tick, shared by every sensor in it
+    lines, stamp, last_epoch = [], None, None
+    for epoch, s_id, temp_c in batch:
+        if epoch != last_epoch:
+            stamp = datetime.fromtimestamp(epoch).strftime(CSV_TIME_FMT)
+            last_epoch = epoch
+        lines.append(f"{stamp},{s_id},{temp_c}\r\n")
+    with open(path, 'a', newline='') as f:
+        f.write("".join(lines))
+
+
+def generate_log(path, rows, sensors=2, interval=5.0, start=None, fmt='csv', seed=1):
+    """Writes about `rows` rows (rounded up to whole ticks). Returns (ids, start, end)."""
+    rng = random.Random(seed)
+    ids = sensor_ids(sensors)
+    ticks = max(1, math.ceil(rows / sensors))
+    if start is None:
+        start = float(int(datetime.now().timestamp() - ticks * interval))
+    base = [18.0 + 4 * i for i in range(sensors)]
+
+    conn = None
+    if fmt == 'binary':
+        if os.path.exists(path): os.remove(path)
+        binary_log.create_log(path)
+    elif fmt == 'sqlite':
+        sqlite_log.create_log(path)
+        conn = sqlite_log.connect(path)
+    else:
+        with open(path, 'w', newline='') as f:
+            f.write("timestamp,sensor_id,temperature\r\n")
+
+    tick = 0
+    while tick < ticks:
+        batch = []
+        for t in range(tick, min(ticks, tick + CHUNK_TICKS)):
+            epoch = start + t * interval
+            drift = 3 * math.sin(t / 720.0)
+            for i, s_id in enumerate(ids):
+                batch.append((epoch, s_id, round(base[i] + drift + rng.uniform(-0.3, 0.3), 2)))
+        tick += CHUNK_TICKS
+        if fmt == 'binary':
+            binary_log.append_records(path, batch)
+        elif fmt == 'sqlite':
+            sqlite_log.append_records(conn, batch)
+        else:
+            _append_csv(path, batch)
+    if conn is not None:
+        sqlite_log.close(conn)
+    return ids, start, start + (ticks - 1) * interval
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a synthetic TempMonitor log")
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=float, default=1e5)
+    parser.add_argument('--sensors', type=int, default=2)
+    parser.add_argument('--interval', type=float, default=5.0)
+    parser.add_argument('--format', choices=('csv', 'binary', 'sqlite'), default='csv')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    ids, start, end = generate_log(args.path, int(args.rows), args.sensors, args.interval,
+                                   fmt=args.format, seed=args.seed)
+    print(f"Wrote {args.path}: {len(ids)} sensors, {datetime.fromtimestamp(start)} .. {datetime.fromtimestamp(end)}")
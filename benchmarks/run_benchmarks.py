@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Headless benchmarks for the history path (no Kivy, mock sensors).
+
+Usage:
+    python benchmarks/run_benchmarks.py                          # default matrix
+    python benchmarks/run_benchmarks.py --rows 1e4,1e6,1e7 --sensors 2,8 --format csv,binary,sqlite
+    python benchmarks/run_benchmarks.py --out results.json
+    python benchmarks/run_benchmarks.py --compare before.json after.json
+
+Each (rows, sensors, format) case runs in its own subprocess on a fresh
+synthetic log, so peak RSS is per case. Timings go through the same calls
+the app makes:
+
+    cold_load       LoggerService.sync()  (history parse + rollups + stats), as the headless service
+    chunked_load    LoggerService.start(background_load=True) until loaded, as in build()
+                    (1 MiB chunks, default memory budget)
+    first_draw      min/max decimation of the full range for every sensor, as in redraw_plots()
+    append_tick     LoggerService.log_tick() + redraw of the live window, as in log_data()
+    unit_switch     range labels + redraw in °F from memory, as in set_units()
+    sensor_remap    redraw for a rotated sensor subset, as in refresh_graph_mapping()
+    range_stats     all-time / 1 h / 24 h stats for every sensor, as in update_range_labels()
+    disk_range      the last 24 h read back from the log file, as HistoryStore.read_range()
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import resource
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, '..', 'src')
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+DEFAULT_ROWS = (1e4, 1e5, 1e6)
+DEFAULT_SENSORS = (2, 8)
+GRAPH_WIDTH = 800   # Buckets for decimation, as for an ~800 px wide chart
+APPEND_TICKS = 200
+
+
+def _timed(fn, repeat=1):
+    """Best-of-`repeat` wall time in seconds, plus the last result."""
+    best, result = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+# --- ONE CASE (runs in a subprocess) ---
+def run_case(rows, sensors, fmt):
+    from generate_log import generate_log
+    from settings_manager import SettingsManager
+    from sensor_reader import MockW1ThermSensor
+    from logger_service import LoggerService
+    from decimate import minmax_decimate
+
+    work = tempfile.mkdtemp(prefix='tm-bench-')
+    try:
+        settings = SettingsManager(data_dir=work)
+        settings.set('log_format', fmt)
+        settings.set('log_rotation', 'off')
+        result = {'rows': rows, 'sensors': sensors, 'format': fmt}
+
+        t_gen, (ids, start, end) = _timed(lambda: generate_log(settings.log_file, rows, sensors, fmt=fmt))
+        result['generate_s'] = t_gen
+        result['log_bytes'] = os.path.getsize(settings.log_file)
+
+        # Chunked background load first, then drop the rollups it persisted
+        loader = LoggerService(settings, sensors=[MockW1ThermSensor(s_id) for s_id in ids])
+
+        def chunked_load():
+            loader.start(background_load=True)
+            loader._load_thread.join()
+        result['chunked_load_s'], _ = _timed(chunked_load)
+        loader.stop()
+        shutil.rmtree(settings.rollup_dir, ignore_errors=True)
+
+        service = LoggerService(settings, sensors=[MockW1ThermSensor(s_id) for s_id in ids])
+        to_f = lambda c: c * 9 / 5 + 32
+
+        def draw(sensor_ids, xmin, xmax, convert=None):
+            for s_id in sensor_ids:
+                series = service.history.get_series(s_id)
+                minmax_decimate(series.ts, series.temps, xmin, xmax, GRAPH_WIDTH, convert)
+
+        def range_labels(sensor_ids, convert):
+            out = []
+            for s_id in sensor_ids:
+                for window in (None,) + service.stats.windows:
+                    st = service.stats.get(s_id, window)
+                    if st is not None:
+                        out.append(f"{convert(st.min):.1f} - {convert(st.max):.1f}")
+            return out
+
+        result['cold_load_s'], _ = _timed(service.sync)
+        result['first_draw_s'], _ = _timed(lambda: draw(ids, start, end), repeat=3)
+        result['history_bytes'] = service.history.memory_bytes()
+
+        # Live ticks: seeded snapshot from the mock poller, writer thread running
+        service.log_writer.start()
+        ticks = []
+        now = end
+        for _ in range(APPEND_TICKS):
+            service.poller.poll_once()
+            now += 5.0
+            t0 = time.perf_counter()
+            service.log_tick(now)
+            draw(ids, now - 3600, now + 10)
+            ticks.append(time.perf_counter() - t0)
+        service.log_writer.stop()
+        result['append_tick_mean_s'] = sum(ticks) / len(ticks)
+        result['append_tick_p95_s'] = _percentile(ticks, 0.95)
+
+        result['unit_switch_s'], _ = _timed(
+            lambda: (range_labels(ids, to_f), draw(ids, start, now, to_f)), repeat=3)
+        remapped = ids[1:] + ids[:1]
+        result['sensor_remap_s'], _ = _timed(
+            lambda: (range_labels(remapped[:2], lambda c: c), draw(remapped[:2], start, now)), repeat=3)
+        result['range_stats_s'], _ = _timed(lambda: range_labels(ids, lambda c: c), repeat=5)
+        result['disk_range_s'], _ = _timed(lambda: service.history.read_range(now - 86400, now), repeat=3)
+
+        # ru_maxrss is KiB on Linux (bytes on macOS)
+        result['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return result
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+# --- DRIVER ---
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _numpy_version():
+    try:
+        import numpy
+        return numpy.__version__
+    except ImportError:
+        return None
+
+
+def run_matrix(rows_list, sensors_list, formats):
+    results = []
+    for fmt in formats:
+        for sensors in sensors_list:
+            for rows in rows_list:
+                cmd = [sys.executable, os.path.abspath(__file__), '--case',
+                       f"{int(rows)},{sensors},{fmt}"]
+                proc = subprocess.run(cmd, capture_output=True, text=True)
+                if proc.returncode != 0:
+                    print(f"Case rows={int(rows)} sensors={sensors} {fmt} failed:\n{proc.stderr}")
+                    continue
+                case = json.loads(proc.stdout.strip().splitlines()[-1])
+                results.append(case)
+                print(f"{fmt:<6} rows={case['rows']:<9} sensors={sensors}  "
+                      f"cold={case['cold_load_s']:.3f}s  chunked={case['chunked_load_s']:.3f}s  draw={case['first_draw_s']:.3f}s  "
+                      f"tick={case['append_tick_mean_s'] * 1000:.2f}ms  "
+                      f"units={case['unit_switch_s']:.3f}s  rss={case['peak_rss_kb'] / 1024:.0f}MiB")
+    return {
+        'meta': {'commit': _git_commit(), 'date': datetime.now().isoformat(timespec='seconds'),
+                 'python': platform.python_version(), 'machine': platform.machine(),
+                 'platform': platform.platform(), 'numpy': _numpy_version()},
+        'results': results,
+    }
+
+
+def compare(before_path, after_path):
+    """Prints after/before ratios per case and metric (<1.0 is faster/smaller)."""
+    with open(before_path) as f: before = json.load(f)
+    with open(after_path) as f: after = json.load(f)
+    key = lambda r: (r['format'], r['sensors'], r['rows'])
+    old = {key(r): r for r in before['results']}
+    for r in after['results']:
+        o = old.get(key(r))
+        if o is None: continue
+        ratios = [f"{m[:-2] if m.endswith('_s') else m}={r[m] / o[m]:.2f}x"
+                  for m in sorted(r) if (m.endswith('_s') or m == 'peak_rss_kb') and o.get(m)]
+        print(f"{r['format']:<6} rows={r['rows']:<9} sensors={r['sensors']}  " + "  ".join(ratios))
+
+
+def _csv_list(text, cast):
+    return [cast(float(v)) for v in text.split(',') if v]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="TempMonitor history-path benchmarks")
+    parser.add_argument('--rows', default=",".join(str(int(r)) for r in DEFAULT_ROWS))
+    parser.add_argument('--sensors', default=",".join(str(s) for s in DEFAULT_SENSORS))
+    parser.add_argument('--format', default='csv')
+    parser.add_argument('--out', help="write results JSON here")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        rows, sensors, fmt = args.case.split(',')
+        print(json.dumps(run_case(int(rows), int(sensors), fmt)))
+    elif args.compare:
+        compare(*args.compare)
+    else:
+        report = run_matrix(_csv_list(args.rows, int), _csv_list(args.sensors, int),
+                            [f for f in args.format.split(',') if f])
+        if args.out:
+            with open(args.out, 'w') as f:
+                json.dump(report, f, indent=1)
+            print(f"Results written to {args.out}")
@@ -51,7 +51,7 @@ echo "Installing/Updating Python requirements..."
 # "$VENV_PYTHON_EXEC" -m pip install kivy[full]
 # "$VENV_PYTHON_EXEC" -m pip install kivy_garden.graph
 # "$VENV_PYTHON_EXEC" -m pip install w1thermsensor
-# "$VENV_PYTHON_EXEC" -m pip install matplotlib
+# "$VENV_PYTHON_EXEC" -m pip install numpy
 
 # --- 4. Create Desktop Shortcut ---
 echo ""
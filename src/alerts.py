@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Alert rules evaluated on every new sample from the poller, with no Kivy
+import. Rules come from the 'alerts' setting, a list of dicts:
+
+    {"name": "Fermenter hot", "type": "high", "sensor": "28-0123", "limit": 21.0,
+     "hysteresis": 0.5, "debounce": 60, "actions": ["banner", "shell"],
+     "command": "/home/pi/notify.sh"}
+
+    type      sensor(s)           limit
+    high      sensor              °C, fires above
+    low       sensor              °C, fires below
+    rate      sensor              °C/min over the last `window` seconds (default 600);
+                                  "direction": "rise", "fall" or "both" (default)
+    disagree  sensor + sensor_b   °C between the two latest readings
+    stale     sensor              seconds since the last reading
+
+A rule fires once its condition has held for `debounce` seconds and clears
+when the value is back `hysteresis` inside the limit. Each transition goes
+to the rule's actions: 'banner' (shown on the monitor screen), 'shell'
+(runs `command` with TEMPMONITOR_ALERT_* variables in the environment) and
+'webhook' (POSTs the event as JSON to `url`). More can be added with
+AlertEngine.register_action(). Shell and webhook actions run on a worker
+thread so a slow hook never delays acquisition.
+
+Every rule keeps running sums, so a sample costs O(1) per rule that watches
+its sensor.
+"""
+import os
+import json
+import time
+import queue
+import threading
+import subprocess
+import urllib.request
+from collections import deque
+
+RULE_TYPES = ('high', 'low', 'rate', 'disagree', 'stale')
+DEFAULT_RATE_WINDOW = 600
+# Readings further apart than this are not compared by a 'disagree' rule
+DISAGREE_MAX_SKEW = 30.0
+ACTION_QUEUE = 100
+HOOK_TIMEOUT = 30.0
+
+
+# --- RULES ---
+class Rule:
+    """
+    Threshold state machine shared by every rule type. measure() turns a
+    sample into the rule's value; update() applies debounce and hysteresis.
+    sign is -1 for rules that fire below their limit.
+    """
+    sign = 1
+
+    def __init__(self, cfg):
+        self.type = cfg['type']
+        self.sensor = cfg['sensor']
+        self.limit = float(cfg['limit'])
+        self.name = cfg.get('name') or f"{self.type} {self.sensor}"
+        self.hysteresis = abs(float(cfg.get('hysteresis', 0.0)))
+        self.debounce = float(cfg.get('debounce', 0.0))
+        self.actions = list(cfg.get('actions', ['banner']))
+        self.config = cfg
+        self.active = False
+        self.value = None
+        self._pending_since = None
+
+    @property
+    def sensors(self):
+        return (self.sensor,)
+
+    def measure(self, epoch, sensor_id, temp_c):
+        return temp_c
+
+    def update(self, epoch, value):
+        """Returns 'fired', 'cleared' or None."""
+        if value is None: return None
+        self.value = value
+        excess = self.sign * (value - self.limit)
+        if not self.active:
+            if excess <= 0:
+                self._pending_since = None
+                return None
+            if self._pending_since is None:
+                self._pending_since = epoch
+            if epoch - self._pending_since < self.debounce: return None
+            self._pending_since = None
+            self.active = True
+            return 'fired'
+        if excess <= -self.hysteresis:
+            self.active = False
+            return 'cleared'
+        return None
+
+
+class LowRule(Rule):
+    sign = -1
+
+
+class RateRule(Rule):
+    """
+    Least-squares slope over a sliding window from running sums: adding or
+    dropping a sample is O(1). Times are kept relative to a base that is
+    moved (and the sums recomputed) every REBASE_EVERY samples, so rounding
+    error cannot build up over months of uptime.
+    """
+    REBASE_EVERY = 4096
+
+    def __init__(self, cfg):
+        super().__init__(cfg)
+        self.window = float(cfg.get('window', DEFAULT_RATE_WINDOW))
+        self.direction = cfg.get('direction', 'both')
+        if self.direction == 'fall':
+            self.sign = -1
+            self.limit = -abs(self.limit)
+        self._samples = deque()
+        self._base = None
+        self._added = 0
+        self._sums = [0.0] * 5  # n, Σt, Σv, Σtt, Σtv
+
+    def _accumulate(self, t, v, k):
+        s = self._sums
+        s[0] += k; s[1] += k * t; s[2] += k * v; s[3] += k * t * t; s[4] += k * t * v
+
+    def _rebase(self):
+        self._base = self._samples[0][0] + self._base if self._samples else None
+        shift = self._samples[0][0] if self._samples else 0.0
+        self._samples = deque((t - shift, v) for t, v in self._samples)
+        self._sums = [0.0] * 5
+        for t, v in self._samples:
+            self._accumulate(t, v, 1)
+
+    def measure(self, epoch, sensor_id, temp_c):
+        if self._base is None:
+            self._base = epoch
+        t = epoch - self._base
+        self._samples.append((t, temp_c))
+        self._accumulate(t, temp_c, 1)
+        cutoff = t - self.window
+        while self._samples[0][0] < cutoff:
+            self._accumulate(*self._samples.popleft(), -1)
+        self._added += 1
+        if self._added % self.REBASE_EVERY == 0:
+            self._rebase()
+
+        n, st, sv, stt, stv = self._sums
+        span = self._samples[-1][0] - self._samples[0][0]
+        # Too little history for a meaningful slope yet
+        if n < 3 or span < self.window / 2: return None
+        denom = n * stt - st * st
+        if denom <= 0: return None
+        slope = (n * stv - st * sv) / denom * 60.0
+        return abs(slope) if self.direction == 'both' else slope
+
+
+class DisagreeRule(Rule):
+    def __init__(self, cfg):
+        super().__init__(cfg)
+        self.sensor_b = cfg['sensor_b']
+        self.max_skew = float(cfg.get('max_skew', DISAGREE_MAX_SKEW))
+        self._last = {}
+
+    @property
+    def sensors(self):
+        return (self.sensor, self.sensor_b)
+
+    def measure(self, epoch, sensor_id, temp_c):
+        self._last[sensor_id] = (temp_c, epoch)
+        a, b = self._last.get(self.sensor), self._last.get(self.sensor_b)
+        if a is None or b is None or abs(a[1] - b[1]) > self.max_skew: return None
+        return abs(a[0] - b[0])
+
+
+class StaleRule(Rule):
+    """Value is the age of the newest reading, checked on every poll."""
+    def __init__(self, cfg):
+        super().__init__(cfg)
+        self.last_seen = None
+
+    def measure(self, epoch, sensor_id, temp_c):
+        self.last_seen = epoch
+        return 0.0
+
+    def age(self, now, started):
+        return now - (self.last_seen if self.last_seen is not None else started)
+
+
+RULE_CLASSES = {'high': Rule, 'low': LowRule, 'rate': RateRule,
+                'disagree': DisagreeRule, 'stale': StaleRule}
+
+
+def make_rule(cfg):
+    if cfg.get('type') not in RULE_CLASSES:
+        raise ValueError(f"unknown alert type {cfg.get('type')!r}")
+    return RULE_CLASSES[cfg['type']](cfg)
+
+
+def load_rules(configs):
+    """Rules from the 'alerts' setting; invalid or disabled entries are skipped."""
+    rules = []
+    for cfg in configs or []:
+        if not isinstance(cfg, dict) or not cfg.get('enabled', True): continue
+        try:
+            rules.append(make_rule(cfg))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Error in alert rule {cfg.get('name', cfg)}: {e}")
+    return rules
+
+
+# --- ACTIONS ---
+def run_shell(event, rule):
+    command = rule.config.get('command')
+    if not command: return
+    env = dict(os.environ)
+    for key, value in event.items():
+        env[f"TEMPMONITOR_ALERT_{key.upper()}"] = str(value)
+    subprocess.run(command, shell=True, env=env, timeout=HOOK_TIMEOUT,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def post_webhook(event, rule):
+    url = rule.config.get('url')
+    if not url: return
+    request = urllib.request.Request(url, data=json.dumps(event).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=HOOK_TIMEOUT) as response:
+        response.read()
+
+
+# --- ENGINE ---
+class AlertEngine:
+    """
+    Routes samples to the rules watching their sensor and dispatches state
+    changes. on_snapshot() is called from the poller thread; active() may
+    be read from any thread. on_change(active) runs after every transition.
+    """
+    def __init__(self, rules, on_change=None):
+        self.rules = list(rules)
+        self.on_change = on_change
+        self._by_sensor = {}
+        self._stale = []
+        for rule in self.rules:
+            if isinstance(rule, StaleRule):
+                self._stale.append(rule)
+            for s_id in rule.sensors:
+                self._by_sensor.setdefault(s_id, []).append(rule)
+        self._last_epoch = {}
+        self._started = time.time()
+        self._active = {}   # rule name -> latest 'fired' event (banner rules)
+        self._lock = threading.Lock()
+        self._actions = {'shell': run_shell, 'webhook': post_webhook}
+        self._queue = queue.Queue(maxsize=ACTION_QUEUE)
+        self._worker = None
+
+    @classmethod
+    def from_settings(cls, settings, on_change=None):
+        return cls(load_rules(settings.get('alerts')), on_change=on_change)
+
+    def register_action(self, name, fn):
+        """fn(event, rule), called on the action thread."""
+        self._actions[name] = fn
+
+    def start(self):
+        if self._worker: return
+        self._worker = threading.Thread(target=self._run_actions, name="AlertActions", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        if not self._worker: return
+        self._queue.put(None)
+        self._worker.join(HOOK_TIMEOUT)
+        self._worker = None
+
+    # --- EVALUATION ---
+    def on_snapshot(self, snapshot, now=None):
+        """Feeds readings not seen before ({sensor_id: (temp_c, epoch)}), then checks staleness."""
+        for s_id, (temp_c, epoch) in snapshot.items():
+            if self._last_epoch.get(s_id) == epoch: continue
+            self._last_epoch[s_id] = epoch
+            self.on_sample(s_id, epoch, temp_c)
+        self.check_stale(time.time() if now is None else now)
+
+    def on_sample(self, sensor_id, epoch, temp_c):
+        for rule in self._by_sensor.get(sensor_id, ()):
+            state = rule.update(epoch, rule.measure(epoch, sensor_id, temp_c))
+            if state: self._emit(rule, state, epoch)
+
+    def check_stale(self, now):
+        for rule in self._stale:
+            state = rule.update(now, rule.age(now, self._started))
+            if state: self._emit(rule, state, now)
+
+    # --- DISPATCH ---
+    def _emit(self, rule, state, epoch):
+        event = {'name': rule.name, 'type': rule.type, 'sensor': rule.sensor, 'state': state,
+                 'value': rule.value, 'limit': rule.limit, 'epoch': epoch}
+        print(f"Alert {state}: {rule.name} ({rule.value:.2f}, limit {rule.limit:g})")
+        if 'banner' in rule.actions:
+            with self._lock:
+                if state == 'fired':
+                    self._active[rule.name] = event
+                else:
+                    self._active.pop(rule.name, None)
+        for name in rule.actions:
+            if name == 'banner': continue
+            try:
+                self._queue.put_nowait((name, event, rule))
+            except queue.Full:
+                print(f"Alert action queue full, dropped {name} for {rule.name}")
+        if self.on_change:
+            try:
+                self.on_change(self.active())
+            except Exception as e:
+                print(f"Error publishing alerts: {e}")
+
+    def _run_actions(self):
+        while True:
+            item = self._queue.get()
+            if item is None: return
+            name, event, rule = item
+            fn = self._actions.get(name)
+            if fn is None:
+                print(f"Unknown alert action {name!r} in {rule.name}")
+                continue
+            try:
+                fn(event, rule)
+            except Exception as e:
+                print(f"Error in alert action {name} for {rule.name}: {e}")
+
+    def active(self):
+        """Fired banner alerts, oldest first."""
+        with self._lock:
+            return sorted(self._active.values(), key=lambda e: e['epoch'])
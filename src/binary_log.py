@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Fixed-width binary temperature log, an optional alternative to templog.csv.
+
+Layout:
+    header   HEADER_SIZE bytes: magic, version, slot count, then a table
+             of MAX_SENSORS null-padded sensor ids (index = slot number)
+    records  RECORD_SIZE bytes each: float64 epoch, uint16 sensor index,
+             2 pad bytes, float32 temperature in C
+
+Usage:
+    python binary_log.py export templog.bin templog.csv
+    python binary_log.py import templog.csv templog.bin
+"""
+import os
+import sys
+import csv
+import mmap
+import struct
+from datetime import datetime
+
+MAGIC = b'TMLOG\x00\x00\x01'
+VERSION = 1
+MAX_SENSORS = 32
+ID_SIZE = 24
+HEADER_FMT = '<8sHHI'
+HEADER_SIZE = struct.calcsize(HEADER_FMT) + MAX_SENSORS * ID_SIZE
+RECORD_FMT = '<dHxxf'
+RECORD_SIZE = struct.calcsize(RECORD_FMT)  # 16 bytes
+BINARY_EXT = '.bin'
+
+RECORD_DTYPE = None
+_np = False  # Not imported yet
+
+
+def get_numpy():
+    """NumPy, imported on first use (slow to import on a Pi, so not at startup), or None."""
+    global _np, RECORD_DTYPE
+    if _np is False:
+        try:
+            import numpy as np
+            RECORD_DTYPE = np.dtype([('ts', '<f8'), ('idx', '<u2'), ('pad', 'V2'), ('temp', '<f4')])
+        except ImportError:
+            np = None
+        _np = np
+    return _np
+
+
+def is_binary_log(path):
+    return path.endswith(BINARY_EXT)
+
+
+# --- HEADER ---
+def create_log(path):
+    """Creates (or truncates to) an empty log with a blank sensor table."""
+    header = struct.pack(HEADER_FMT, MAGIC, VERSION, MAX_SENSORS, HEADER_SIZE)
+    header += b'\x00' * (MAX_SENSORS * ID_SIZE)
+    with open(path, 'wb') as f:
+        f.write(header)
+
+
+def _read_sensor_table(f):
+    f.seek(0)
+    raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError("Truncated binary log header")
+    magic, version, slots, header_size = struct.unpack_from(HEADER_FMT, raw)
+    if magic != MAGIC or header_size != HEADER_SIZE:
+        raise ValueError("Not a TempMonitor binary log")
+    ids = []
+    base = struct.calcsize(HEADER_FMT)
+    for i in range(slots):
+        slot = raw[base + i * ID_SIZE: base + (i + 1) * ID_SIZE].rstrip(b'\x00')
+        if not slot: break
+        ids.append(slot.decode('ascii', errors='replace'))
+    return ids
+
+
+def read_sensor_ids(path):
+    with open(path, 'rb') as f:
+        return _read_sensor_table(f)
+
+
+# --- WRITE ---
+def append_records(path, records):
+    """
+    Appends (epoch, sensor_id, temp_c) tuples.
+    New sensor ids are assigned the next free slot in the header table.
+    """
+    if not records: return
+    if not os.path.exists(path):
+        create_log(path)
+
+    with open(path, 'r+b') as f:
+        ids = _read_sensor_table(f)
+        index = {s_id: i for i, s_id in enumerate(ids)}
+        base = struct.calcsize(HEADER_FMT)
+
+        packed = bytearray()
+        for epoch, sensor_id, temp_c in records:
+            idx = index.get(sensor_id)
+            if idx is None:
+                if len(ids) >= MAX_SENSORS:
+                    print(f"Binary log sensor table full, dropping {sensor_id}")
+                    continue
+                idx = index[sensor_id] = len(ids)
+                ids.append(sensor_id)
+                f.seek(base + idx * ID_SIZE)
+                f.write(sensor_id.encode('ascii', errors='replace')[:ID_SIZE].ljust(ID_SIZE, b'\x00'))
+            packed += struct.pack(RECORD_FMT, epoch, idx, temp_c)
+
+        # Only whole records are appended; trim any torn tail from a crash first
+        end = f.seek(0, os.SEEK_END)
+        torn = (end - HEADER_SIZE) % RECORD_SIZE
+        if torn:
+            f.truncate(end - torn)
+            f.seek(end - torn)
+        f.write(packed)
+
+
+# --- READ ---
+def read_records(path, offset=0, max_records=None):
+    """
+    Reads every complete record after byte `offset` (0 = start of data),
+    or at most `max_records` of them.
+    Returns (sensor_ids, records, new_offset). With NumPy, `records` is a
+    structured array viewing the mmap (no copy; it must be consumed before
+    the next write to the file). Without NumPy it is a list of
+    (epoch, idx, temp_c) tuples.
+    """
+    offset = max(offset, HEADER_SIZE)
+    with open(path, 'rb') as f:
+        ids = _read_sensor_table(f)
+        size = os.fstat(f.fileno()).st_size
+        count = (size - offset) // RECORD_SIZE
+        if max_records is not None:
+            count = min(count, max_records)
+        if count <= 0:
+            return ids, [], offset
+        end = offset + count * RECORD_SIZE
+
+        np = get_numpy()
+        if np is not None:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            records = np.frombuffer(mm, dtype=RECORD_DTYPE, count=count, offset=offset)
+        else:
+            f.seek(offset)
+            records = list(struct.iter_unpack(RECORD_FMT, f.read(end - offset)))
+    return ids, records, end
+
+
+def read_range(path, t0, t1):
+    """
+    Binary-searches the time-ordered records for t0 <= epoch <= t1 and
+    returns (sensor_ids, rows) with rows as (epoch, idx, temp_c) tuples.
+    """
+    with open(path, 'rb') as f:
+        ids = _read_sensor_table(f)
+        count = (os.fstat(f.fileno()).st_size - HEADER_SIZE) // RECORD_SIZE
+        if count <= 0:
+            return ids, []
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    np = get_numpy()
+    if np is not None:
+        records = np.frombuffer(mm, dtype=RECORD_DTYPE, count=count, offset=HEADER_SIZE)
+        lo = int(np.searchsorted(records['ts'], t0, side='left'))
+        hi = int(np.searchsorted(records['ts'], t1, side='right'))
+        window = records[lo:hi]
+        return ids, list(zip(window['ts'].tolist(), window['idx'].tolist(), window['temp'].tolist()))
+
+    def ts_at(i):
+        return struct.unpack_from('<d', mm, HEADER_SIZE + i * RECORD_SIZE)[0]
+
+    def search(t, right):
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            v = ts_at(mid)
+            if v < t or (right and v == t):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    lo, hi = search(t0, False), search(t1, True)
+    rows = list(struct.iter_unpack(RECORD_FMT, mm[HEADER_SIZE + lo * RECORD_SIZE:
+                                                  HEADER_SIZE + hi * RECORD_SIZE]))
+    mm.close()
+    return ids, rows
+
+
+def iter_rows(path):
+    """Yields (epoch, sensor_id, temp_c) for every record in the log."""
+    ids, records, _ = read_records(path)
+    if get_numpy() is not None and len(records):
+        for ts, idx, temp in zip(records['ts'].tolist(), records['idx'].tolist(),
+                                 records['temp'].tolist()):
+            yield ts, ids[idx], temp
+    else:
+        for ts, idx, temp in records:
+            yield ts, ids[idx], temp
+
+
+# --- CONVERSION ---
+def export_csv(bin_path, csv_path):
+    """Writes the binary log in the classic templog.csv layout."""
+    count = 0
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['timestamp', 'sensor_id', 'temperature'])
+        for epoch, sensor_id, temp_c in iter_rows(bin_path):
+            writer.writerow([datetime.fromtimestamp(round(epoch, 3)).isoformat(' ', 'milliseconds'),
+                             sensor_id, round(temp_c, 3)])
+            count += 1
+    return count
+
+
+def import_csv(csv_path, bin_path, batch_size=10000):
+    """Converts an existing templog.csv into a new binary log."""
+    create_log(bin_path)
+    count = 0
+    batch = []
+    with open(csv_path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) < 3: continue
+            try:
+                epoch = datetime.fromisoformat(row[0]).timestamp()
+                batch.append((epoch, row[1], float(row[2])))
+            except ValueError: continue
+            if len(batch) >= batch_size:
+                append_records(bin_path, batch)
+                count += len(batch)
+                batch = []
+    append_records(bin_path, batch)
+    return count + len(batch)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4 or sys.argv[1] not in ('export', 'import'):
+        print(__doc__)
+        sys.exit(1)
+    mode, src, dst = sys.argv[1:]
+    if mode == 'export':
+        n = export_csv(src, dst)
+    else:
+        n = import_csv(src, dst)
+    print(f"{mode}: {n} rows written to {dst}")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+from bisect import bisect_left, bisect_right
+
+
+# --- MIN/MAX DOWNSAMPLING ---
+def visible_slice(ts, xmin, xmax):
+    """
+    Index range [lo, hi) of a time-ordered column covering xmin..xmax,
+    widened by one sample on each side so lines run to the graph edges.
+    """
+    lo = max(0, bisect_left(ts, xmin) - 1)
+    hi = min(len(ts), bisect_right(ts, xmax) + 1)
+    return lo, hi
+
+
+def minmax_decimate(ts, values, xmin, xmax, buckets, convert=None):
+    """
+    Reduces a series to at most ~2 points per bucket (one bucket per pixel
+    column) by keeping the min and max sample of each bucket in time order,
+    so spikes stay visible. Works on array('d') columns; the full-resolution
+    data is never modified. Returns a list of (x, y) plot points.
+    """
+    if convert is None:
+        convert = lambda v: v
+    lo, hi = visible_slice(ts, xmin, xmax)
+    if hi - lo <= 2 * buckets or xmax <= xmin:
+        return [(ts[i], convert(values[i])) for i in range(lo, hi)]
+
+    points = []
+    width = (xmax - xmin) / buckets
+    start = lo
+    # Samples before xmin / after xmax become their own edge buckets
+    edges = [xmin + width * b for b in range(1, buckets)] + [xmax, float('inf')]
+    for edge in edges:
+        end = bisect_left(ts, edge, start, hi)
+        if end <= start: continue
+        if end - start <= 2:
+            points.extend((ts[i], convert(values[i])) for i in range(start, end))
+        else:
+            chunk = values[start:end]
+            lo_v, hi_v = min(chunk), max(chunk)
+            i_min = start + chunk.index(lo_v)
+            i_max = start + chunk.index(hi_v)
+            if i_min == i_max:
+                points.append((ts[i_min], convert(lo_v)))
+            elif i_min < i_max:
+                points.append((ts[i_min], convert(lo_v)))
+                points.append((ts[i_max], convert(hi_v)))
+            else:
+                points.append((ts[i_max], convert(hi_v)))
+                points.append((ts[i_min], convert(lo_v)))
+        start = end
+        if start >= hi: break
+    return points
@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+import os
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import binary_log
+import sqlite_log
+from decimate import visible_slice
+
+# One sparse-index entry (epoch, byte offset) every N parsed CSV rows
+INDEX_STRIDE = 512
+# Rows fetched per query when catching up on a SQLite log
+SQLITE_BATCH = 65536
+# Vectorized CSV parse: below this the per-row loop is faster; pieces stay cache sized
+VECTOR_MIN_BYTES = 8 * 1024
+VECTOR_PIECE_BYTES = 1024 * 1024
+# Time zone offsets only change on quarter-hour boundaries
+TZ_SLOT = 900
+# Memory budget: once over it, the oldest samples are evicted down to this fraction
+EVICT_TO = 0.75
+# Share of the budget samples keep even when stats and rollups use the rest
+MIN_HISTORY_SHARE = 0.25
+# Evicted history is read back from disk in pages of this many seconds (all sensors)
+PAGE_SECONDS = 3600
+# Paged-back chunks may use up to this fraction of the memory budget
+PAGE_CACHE_SHARE = 0.25
+# Typical CSV row on disk, to size an unparsed backlog before any row was seen
+CSV_ROW_BYTES = 40
+_EPOCH = datetime(1970, 1, 1)
+
+
+# --- COLUMNAR SERIES ---
+class SensorSeries:
+    """
+    Per-sensor samples stored column-wise in two array('d') buffers:
+    epoch seconds and temperature in °C (16 bytes per sample).
+    All-time min/max are tracked on append, always in °C.
+    `dropped` counts samples evicted from the front, so consumers that
+    remember "samples seen" (rollups, stats) can keep absolute positions.
+    """
+    __slots__ = ('ts', 'temps', 'min_c', 'max_c', 'dropped', 'evicted_until')
+
+    def __init__(self):
+        self.ts = array('d')
+        self.temps = array('d')
+        self.min_c = None
+        self.max_c = None
+        self.dropped = 0
+        self.evicted_until = None  # Newest evicted epoch
+
+    def __len__(self):
+        return len(self.ts)
+
+    def append(self, epoch, temp_c):
+        self.ts.append(epoch)
+        self.temps.append(temp_c)
+        if self.min_c is None or temp_c < self.min_c: self.min_c = temp_c
+        if self.max_c is None or temp_c > self.max_c: self.max_c = temp_c
+
+    def extend(self, epochs, temps_c):
+        """Bulk append of already-parsed columns (lists, arrays or NumPy arrays)."""
+        if not len(temps_c): return
+        if hasattr(temps_c, 'dtype'):
+            # NumPy columns: one buffer copy each, vectorized min/max
+            self.ts.frombytes(epochs.astype('d').tobytes())
+            self.temps.frombytes(temps_c.astype('d').tobytes())
+            lo, hi = float(temps_c.min()), float(temps_c.max())
+        else:
+            self.ts.extend(epochs)
+            self.temps.extend(temps_c)
+            lo, hi = min(temps_c), max(temps_c)
+        if self.min_c is None or lo < self.min_c: self.min_c = lo
+        if self.max_c is None or hi > self.max_c: self.max_c = hi
+
+    def clear(self):
+        del self.ts[:]
+        del self.temps[:]
+        self.min_c = None
+        self.max_c = None
+        self.dropped = 0
+        self.evicted_until = None
+
+    def drop_before(self, epoch):
+        """Evicts samples older than `epoch` (all-time min/max are kept). Returns the count."""
+        k = bisect_left(self.ts, epoch)
+        if k:
+            self.evicted_until = self.ts[k - 1]
+            del self.ts[:k]
+            del self.temps[:k]
+            self.dropped += k
+        return k
+
+    def last(self):
+        """Returns the newest (epoch, temp_c) or None."""
+        if not self.ts: return None
+        return self.ts[-1], self.temps[-1]
+
+
+# --- INCREMENTAL HISTORY STORE ---
+class HistoryStore:
+    """
+    Keeps every parsed row of the log (templog.csv, a binary .bin log or a
+    SQLite .db log) in memory as one SensorSeries per sensor and remembers
+    the byte offset already consumed (for SQLite: the last rowid).
+    refresh() only parses bytes appended since the last call, so unit
+    switches and sensor remaps are answered without touching disk.
+    A sparse (epoch -> byte offset) index lets read_range() pull a time
+    window back from disk without scanning the whole file.
+    When this process also writes the log, rows are ingest()ed straight
+    into memory and the writer reports the bytes via mark_appended(), so
+    they are not parsed a second time.
+    With a `memory_budget` (bytes), evict() drops the oldest samples once
+    the series outgrow it; read_window() pages them back from the live log
+    in PAGE_SECONDS chunks, keeping recently used chunks in an LRU cache.
+    `reserved` is the part of the budget other structures built from these
+    samples (stats windows, rollups) already use; the owner keeps it current.
+    """
+    def __init__(self, log_file, sensor_ids=(), memory_budget=None):
+        self.log_file = log_file
+        self.memory_budget = memory_budget
+        self.reserved = 0
+        self._series = {}   # sensor_id -> SensorSeries
+        self._offset = 0
+        self._file_id = None
+        self._rows = 0
+        self._index_ts = array('d')
+        self._index_off = array('q')
+        self._unflushed = None  # Oldest ingested epoch our writer has not flushed yet
+        self._unindexed = 0     # Rows ingested since the last sparse-index entry
+        self._log_first = None  # Oldest epoch in the live log (cached)
+        self._pages = OrderedDict()  # page number -> {sensor_id: (ts, temps)}, LRU order
+        self._page_bytes = 0
+        self._page_lock = threading.Lock()
+        self.lock = threading.RLock()
+        self._db = None     # Cached SQLite connection (SQLite logs only)
+        self.ensure_sensors(sensor_ids)
+
+    def ensure_sensors(self, sensor_ids):
+        """Registers sensors (e.g. everything on the bus) even before they have data."""
+        for s_id in sensor_ids:
+            if s_id not in self._series:
+                self._series[s_id] = SensorSeries()
+
+    def close(self):
+        """Releases the SQLite connection (before the file is moved or deleted)."""
+        with self.lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _sqlite(self):
+        if self._db is None:
+            self._db = sqlite_log.connect(self.log_file)
+        return self._db
+
+    def clear(self):
+        for series in self._series.values():
+            series.clear()
+        self._offset = 0
+        self._file_id = None
+        self._forget_log()
+
+    def _forget_log(self):
+        """Drops everything derived from the current log file."""
+        self._rows = 0
+        self._index_ts = array('d')
+        self._index_off = array('q')
+        self._unflushed = None
+        self._unindexed = 0
+        self._log_first = None
+        with self._page_lock:
+            self._pages.clear()
+            self._page_bytes = 0
+
+    def rebase(self):
+        """
+        The live log was rotated away and replaced by a fresh file: keep the
+        samples already in memory and continue from the new file's end.
+        """
+        with self.lock:
+            try:
+                st = os.stat(self.log_file)
+            except OSError:
+                st = None
+            self._file_id = (st.st_dev, st.st_ino) if st else None
+            self._offset = st.st_size if st else 0
+            if sqlite_log.is_sqlite_log(self.log_file):
+                self.close()
+                self._offset = sqlite_log.last_id(self._sqlite()) if st else 0
+            self._forget_log()
+
+    def first_epoch(self):
+        """Oldest sample held in memory across all sensors, or None."""
+        firsts = [s.ts[0] for s in self._series.values() if len(s)]
+        return min(firsts) if firsts else None
+
+    def sensor_ids(self):
+        return list(self._series.keys())
+
+    def get_series(self, sensor_id):
+        """Returns the SensorSeries for a sensor (empty if unknown)."""
+        series = self._series.get(sensor_id)
+        return series if series is not None else SensorSeries()
+
+    def memory_bytes(self):
+        """Approximate buffer size of all stored samples."""
+        return sum(s.ts.buffer_info()[1] * s.ts.itemsize * 2 for s in self._series.values())
+
+    def page_cache_bytes(self):
+        return self._page_bytes
+
+    def ingest(self, rows):
+        """Adds freshly logged (epoch, sensor_id, temp_c) rows to memory."""
+        with self.lock:
+            for epoch, s_id, temp_c in rows:
+                target = self._series.get(s_id)
+                if target is None:
+                    target = self._series[s_id] = SensorSeries()
+                target.append(epoch, temp_c)
+            if rows and self._unflushed is None:
+                self._unflushed = rows[0][0]
+            self._unindexed += len(rows)
+
+    def mark_appended(self, nbytes):
+        """Skips `nbytes` just written by our own writer (already ingested)."""
+        with self.lock:
+            if binary_log.is_binary_log(self.log_file):
+                self._offset = max(self._offset, binary_log.HEADER_SIZE)
+            elif not sqlite_log.is_sqlite_log(self.log_file) and self._unflushed is not None:
+                # Rows we wrote ourselves are never parsed: index them here so
+                # read_range() can seek into them. The flush holds every row
+                # ingested so far, starting with the oldest unflushed one.
+                if not self._index_ts or self._unindexed >= INDEX_STRIDE:
+                    self._index_ts.append(self._unflushed)
+                    self._index_off.append(self._offset)
+                    self._unindexed = 0
+            self._unflushed = None
+            self._offset += nbytes
+
+    def refresh(self, max_bytes=None):
+        """Parses any rows appended to the log since the last refresh
+        (at most about `max_bytes` of them, for progressive loading)."""
+        with self.lock:
+            return self._refresh(max_bytes)
+
+    def backlog(self):
+        """Bytes of log not parsed yet."""
+        if sqlite_log.is_sqlite_log(self.log_file):
+            with self.lock:
+                if not os.path.exists(self.log_file): return 0
+                return max(0, sqlite_log.last_id(self._sqlite()) - self._offset) * sqlite_log.ROW_BYTES
+        try:
+            return max(0, os.path.getsize(self.log_file) - self._offset)
+        except OSError:
+            return 0
+
+    def backlog_fits(self):
+        """True if parsing the whole backlog at once keeps memory within the
+        budget (always, without one): no need to load it in chunks."""
+        if not self.memory_budget: return True
+        backlog = self.backlog()
+        with self.lock:
+            if binary_log.is_binary_log(self.log_file):
+                row_bytes = binary_log.RECORD_SIZE
+            elif sqlite_log.is_sqlite_log(self.log_file):
+                row_bytes = sqlite_log.ROW_BYTES
+            else:
+                row_bytes = self._offset / self._rows if self._rows else CSV_ROW_BYTES
+            # Two float64 columns per sample
+            return self.memory_bytes() + backlog / row_bytes * 16 <= self._budget()
+
+    def _budget(self):
+        """Bytes the samples themselves may use."""
+        return max(self.memory_budget - self.reserved, self.memory_budget * MIN_HISTORY_SHARE)
+
+    def _refresh(self, max_bytes=None):
+        try:
+            st = os.stat(self.log_file)
+        except OSError:
+            self.clear()
+            return 0
+
+        # File replaced or truncated (e.g. RESET CSV DATA) -> start over
+        file_id = (st.st_dev, st.st_ino)
+        if sqlite_log.is_sqlite_log(self.log_file):
+            if file_id != self._file_id:
+                self.close()
+                self.clear()
+                self._file_id = file_id
+            return self._refresh_sqlite(max_bytes)
+        if file_id != self._file_id or st.st_size < self._offset:
+            self.clear()
+            self._file_id = file_id
+
+        if st.st_size == self._offset: return 0
+        if binary_log.is_binary_log(self.log_file):
+            return self._refresh_binary(max_bytes)
+
+        size = st.st_size - self._offset
+        with open(self.log_file, 'rb') as f:
+            f.seek(self._offset)
+            chunk = f.read(min(size, max_bytes) if max_bytes else size)
+
+        # Only consume complete lines; a half-written row is picked up next time
+        end = chunk.rfind(b'\n')
+        if end < 0: return 0
+        base = self._offset
+        self._offset += end + 1
+        return self._parse_chunk(chunk[:end], base)
+
+    def _refresh_binary(self, max_bytes=None):
+        max_records = max(1, max_bytes // binary_log.RECORD_SIZE) if max_bytes else None
+        ids, records, self._offset = binary_log.read_records(self.log_file, self._offset, max_records)
+        if not len(records): return 0
+        self.ensure_sensors(ids)
+
+        if binary_log.get_numpy() is not None:
+            # Split the mmap'd records per sensor with a boolean mask
+            idx_col = records['idx']
+            for idx, s_id in enumerate(ids):
+                mask = idx_col == idx
+                if not mask.any(): continue
+                self._series[s_id].extend(records['ts'][mask], records['temp'][mask])
+        else:
+            for epoch, idx, temp_c in records:
+                self._series[ids[idx]].append(epoch, temp_c)
+        return len(records)
+
+    def _refresh_sqlite(self, max_bytes=None):
+        # New rows sit in the WAL, so the file size says nothing: ask by rowid,
+        # in batches so a full load never holds more than one batch of tuples
+        limit = max(1, max_bytes // sqlite_log.ROW_BYTES) if max_bytes else None
+        added = 0
+        while limit is None or added < limit:
+            batch = SQLITE_BATCH if limit is None else min(SQLITE_BATCH, limit - added)
+            names, rows, self._offset = sqlite_log.read_records(self._sqlite(), self._offset, batch)
+            if not rows: break
+            self.ensure_sensors(names.values())
+            series = {idx: self._series[s_id] for idx, s_id in names.items()}
+            for epoch, idx, temp_c in rows:
+                series[idx].append(epoch, temp_c)
+            added += len(rows)
+        return added
+
+    def _parse_chunk(self, chunk, base_offset):
+        """Parses complete CSV lines (the header fails to parse and is skipped).
+        With NumPy, large chunks go through the vectorized parser in
+        cache-sized pieces; a piece it cannot handle is parsed row by row."""
+        if binary_log.get_numpy() is None or len(chunk) < VECTOR_MIN_BYTES:
+            return self._parse_rows(chunk, base_offset)
+        added, pos = 0, 0
+        while pos < len(chunk):
+            end = chunk.rfind(b'\n', pos, pos + VECTOR_PIECE_BYTES)
+            if end < 0 or len(chunk) - pos <= VECTOR_PIECE_BYTES: end = len(chunk)
+            piece = chunk[pos:end]
+            n = self._parse_chunk_numpy(piece, base_offset + pos)
+            added += n if n is not None else self._parse_rows(piece, base_offset + pos)
+            pos = end + 1
+        return added
+
+    def _parse_rows(self, chunk, base_offset):
+        added = 0
+        series = self._series
+        id_cache = {}
+        pos = base_offset
+        for raw in chunk.split(b'\n'):
+            line_start = pos
+            pos += len(raw) + 1
+            parts = raw.split(b',')
+            if len(parts) < 3: continue
+            try:
+                temp_val = float(parts[2])
+                x_val = datetime.fromisoformat(parts[0].decode('ascii')).timestamp()
+            except ValueError: continue
+
+            s_id = id_cache.get(parts[1])
+            if s_id is None:
+                s_id = id_cache[parts[1]] = parts[1].decode('utf-8', errors='replace')
+            target = series.get(s_id)
+            if target is None:
+                target = series[s_id] = SensorSeries()
+            target.append(x_val, temp_val)
+
+            if self._rows % INDEX_STRIDE == 0:
+                self._index_ts.append(x_val)
+                self._index_off.append(line_start)
+            self._rows += 1
+            added += 1
+        return added
+
+    def _parse_chunk_numpy(self, chunk, base_offset):
+        """
+        Vectorized parse of LogWriter's fixed layout
+        'YYYY-MM-DD HH:MM:SS[.mmm],sensor_id,temp': the whole chunk is one uint8
+        array, fields are located by newline/comma positions, timestamps and
+        temperatures are built from their digits, and rows are split per
+        sensor with a boolean mask. Returns None if a row would parse the
+        slow way but not this way, so the caller falls back to it.
+        """
+        np = binary_log.get_numpy()
+        # Zero padding lets fixed-offset gathers run past a short last row
+        buf = np.frombuffer(chunk + b'\n' + bytes(32), dtype=np.uint8)
+        ends = np.flatnonzero(buf[:len(chunk) + 1] == 10)
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        ends = ends - (buf[np.maximum(ends - 1, 0)] == 13)   # CRLF
+        keep = ends > starts
+        starts, ends = starts[keep], ends[keep]
+        at = lambda pos, k=0: buf[pos + k]
+
+        # Row shape: exactly two commas, the first right after a 19-char
+        # timestamp or a 23-char one with milliseconds
+        commas = np.flatnonzero(buf == 44)
+        first = np.searchsorted(commas, starts)
+        ok = (np.searchsorted(commas, ends) - first == 2) & (ends - starts >= 23)
+        first = np.minimum(first, max(0, len(commas) - 2))
+        c1 = commas[first] if len(commas) else starts
+        c2 = commas[first + 1] if len(commas) > 1 else ends
+        ts_len = c1 - starts
+        ok &= ((ts_len == 19) | (ts_len == 23)) & (c2 > c1 + 1) & (ends > c2 + 1)
+        for k, sep in ((4, 45), (7, 45), (10, 32), (13, 58), (16, 58)):   # '-', ' ', ':'
+            ok &= at(starts, k) == sep
+        digits = {k: at(starts, k).astype(np.int32) - 48
+                  for k in (0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18)}
+        for v in digits.values():
+            ok &= (v >= 0) & (v <= 9)
+        has_ms = ts_len == 23
+        ms = np.zeros(len(starts), dtype=np.int32)
+        ms_ok = at(starts, 19) == 46   # '.'
+        for k in (20, 21, 22):
+            v = at(starts, k).astype(np.int32) - 48
+            ms_ok &= (v >= 0) & (v <= 9)
+            ms = ms * 10 + v
+        ok &= ~has_ms | ms_ok
+        ms = np.where(has_ms, ms, 0)
+
+        if not ok.all():
+            # Rows rejected here must be rows the slow parser rejects too (the header)
+            for i in np.flatnonzero(~ok).tolist():
+                parts = chunk[starts[i]:ends[i]].split(b',')
+                try:
+                    float(parts[2])
+                    datetime.fromisoformat(parts[0].decode('ascii'))
+                    return None
+                except (IndexError, ValueError, UnicodeDecodeError): pass
+            starts, ends, c1, c2, ms = starts[ok], ends[ok], c1[ok], c2[ok], ms[ok]
+            digits = {k: v[ok] for k, v in digits.items()}
+        if not len(starts): return 0
+
+        temps = self._parse_decimals(np, buf, c2 + 1, ends)
+        if temps is None: return None
+
+        # Civil date -> days since 1970 (proleptic Gregorian), all rows at once
+        d = lambda k: digits[k] * 10 + digits[k + 1]
+        year, month, day = d(0) * 100 + d(2), d(5), d(8)
+        if ((month < 1) | (month > 12) | (day < 1) | (day > 31)).any(): return None
+        y = year - (month <= 2)
+        era = y // 400
+        yoe = y - era * 400
+        doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+        days = (era * 146097 + yoe * 365 + yoe // 4 - yoe // 100 + doy - 719468).astype(np.int64)
+        naive = days * 86400 + d(11) * 3600 + d(14) * 60 + d(17)
+        # Local time -> epoch: one datetime call per quarter hour, not per row
+        slots, slot_of = np.unique(naive // TZ_SLOT, return_inverse=True)
+        offsets = np.array([s * TZ_SLOT - (_EPOCH + timedelta(seconds=s * TZ_SLOT)).timestamp()
+                            for s in slots.tolist()])
+        # Whole seconds + ms / 1000, the same arithmetic as datetime.timestamp()
+        epochs = (naive - offsets[slot_of.ravel()]) + ms * 1000 / 1e6
+
+        # Split per sensor with one boolean mask each; the few distinct ids
+        # come from the first rows (a full unique() only if more turn up later)
+        width = int((c2 - c1 - 1).max())
+        idx = (c1 + 1)[:, None] + np.arange(width)
+        cells = np.where(idx < c2[:, None], buf[np.minimum(idx, len(buf) - 1)], 0)
+        id_col = np.ascontiguousarray(cells, dtype=np.uint8).view(f'S{width}').ravel()
+        ids = np.unique(id_col[:4096]).tolist()
+        masks = [id_col == raw for raw in ids]
+        seen = np.logical_or.reduce(masks)
+        if not seen.all():
+            rest = np.unique(id_col[~seen]).tolist()
+            ids += rest
+            masks += [id_col == raw for raw in rest]
+        series = self._series
+        for raw, mask in zip(ids, masks):
+            s_id = raw.decode('utf-8', errors='replace')
+            target = series.get(s_id)
+            if target is None:
+                target = series[s_id] = SensorSeries()
+            target.extend(epochs[mask], temps[mask])
+
+        rows = np.arange(self._rows, self._rows + len(starts))
+        marks = np.flatnonzero(rows % INDEX_STRIDE == 0)
+        self._index_ts.extend(epochs[marks].tolist())
+        self._index_off.extend((starts[marks] + base_offset).tolist())
+        self._rows += len(starts)
+        return len(starts)
+
+    @staticmethod
+    def _parse_decimals(np, buf, lo, hi):
+        """
+        Plain decimals ('-12.345') in buf[lo:hi] per row, or None if any row
+        has another shape. mantissa / 10**decimals is correctly rounded, so
+        the result equals float() of the text.
+        """
+        width = int((hi - lo).max())
+        if width > 17: return None
+        mantissa = np.zeros(len(lo), dtype=np.int64)
+        decimals = np.zeros(len(lo), dtype=np.int64)
+        seen_dot = np.zeros(len(lo), dtype=bool)
+        n_digits = np.zeros(len(lo), dtype=np.int64)
+        negative = buf[lo] == 45
+        for j in range(width):
+            live = j < hi - lo
+            ch = buf[lo + j]
+            digit = (ch >= 48) & (ch <= 57) & live
+            dot = (ch == 46) & live
+            if ((live & ~digit & ~dot & ~((j == 0) & negative)) | (dot & seen_dot)).any():
+                return None
+            mantissa = np.where(digit, mantissa * 10 + (ch.astype(np.int64) - 48), mantissa)
+            decimals += digit & seen_dot
+            n_digits += digit
+            seen_dot |= dot
+        if (n_digits == 0).any(): return None
+        values = mantissa / 10.0 ** decimals
+        return np.where(negative, -values, values)
+
+    # --- MEMORY BUDGET ---
+    def evict(self):
+        """
+        Over budget: drops the oldest samples across all sensors (one common
+        time cutoff) until EVICT_TO of the budget is used. Call it after the
+        rollups and stats have consumed the new samples. Returns samples dropped.
+        """
+        if not self.memory_budget: return 0
+        with self.lock:
+            budget = self._budget()
+            if self.memory_bytes() <= budget: return 0
+            series = [s for s in self._series.values() if len(s)]
+            keep = int(budget * EVICT_TO) // 16
+
+            # Bisect the cutoff epoch on the number of samples it would keep
+            lo = min(s.ts[0] for s in series)
+            hi = max(s.ts[-1] for s in series)
+            for _ in range(60):
+                mid = (lo + hi) / 2
+                if sum(len(s) - bisect_left(s.ts, mid) for s in series) > keep:
+                    lo = mid
+                else:
+                    hi = mid
+                if hi - lo < 1e-3: break
+            return sum(s.drop_before(hi) for s in series)
+
+    def log_first_epoch(self):
+        """Oldest epoch in the live log file, or None if it is empty."""
+        if self._log_first is None:
+            try:
+                self._log_first = self._read_first_epoch()
+            except (OSError, ValueError, sqlite3.Error):
+                return None
+        return self._log_first
+
+    def _read_first_epoch(self):
+        if not os.path.exists(self.log_file): return None
+        if sqlite_log.is_sqlite_log(self.log_file):
+            with self.lock:
+                return sqlite_log.first_epoch(self._sqlite())
+        if binary_log.is_binary_log(self.log_file):
+            _, records, _ = binary_log.read_records(self.log_file, 0, 1)
+            return float(records[0][0]) if len(records) else None
+        with open(self.log_file, 'rb') as f:
+            for raw in f:
+                parts = raw.split(b',')
+                if len(parts) < 3: continue
+                try:
+                    return datetime.fromisoformat(parts[0].decode('ascii')).timestamp()
+                except ValueError: continue
+        return None
+
+    def live_start(self, sensor_id):
+        """Oldest epoch read_window() can return for a sensor; older data
+        can only be in the archive."""
+        series = self.get_series(sensor_id)
+        first = series.ts[0] if len(series) else None
+        if series.dropped:
+            log_first = self.log_first_epoch()
+            if log_first is not None and (first is None or log_first < first):
+                return log_first
+        return first
+
+    def read_window(self, sensor_id, t0, t1):
+        """
+        (ts, temps) columns of one sensor covering t0..t1 as far as memory
+        and the live log go: the window's part of the in-memory series,
+        preceded by pages read back from disk for any evicted part of it.
+        Columns may extend past the window on either side (by one sample
+        in memory, to the page edge on disk).
+        """
+        with self.lock:
+            series = self.get_series(sensor_id)
+            first = series.ts[0] if len(series.ts) else None
+            # Copy only the window, not the whole series
+            lo, hi = visible_slice(series.ts, t0, t1)
+            ts, temps = series.ts[lo:hi], series.temps[lo:hi]
+            log_first = self.log_first_epoch() if series.dropped else None
+            # Anything older than memory is covered by disk pages (if the
+            # live log has it) up to the last evicted sample
+            floor = series.evicted_until
+        if log_first is None or floor is None: return ts, temps
+        lo = max(t0, log_first)
+        hi = min(t1, floor)
+        if lo > hi: return ts, temps
+        pts, ptemps = array('d'), array('d')
+        for page in range(int(lo // PAGE_SECONDS), int(hi // PAGE_SECONDS) + 1):
+            cols = self._page(page, floor).get(sensor_id)
+            if cols is None: continue
+            end = bisect_left(cols[0], first) if first is not None else len(cols[0])
+            pts.extend(cols[0][:end])
+            ptemps.extend(cols[1][:end])
+        return pts + ts, ptemps + temps
+
+    def _page(self, page, floor):
+        """{sensor_id: (ts, temps)} for one PAGE_SECONDS chunk of the live log,
+        cached once it lies entirely before the eviction floor."""
+        with self._page_lock:
+            cols = self._pages.get(page)
+            if cols is not None:
+                self._pages.move_to_end(page)
+                return cols
+        t0 = page * PAGE_SECONDS
+        t1 = t0 + PAGE_SECONDS
+        cols = {}
+        for s_id, found in self.read_range(t0, t1).items():
+            end = bisect_left(found.ts, t1)
+            cols[s_id] = (found.ts[:end], found.temps[:end])
+        if t1 <= floor and self.memory_budget:
+            size = sum(len(ts) * 16 for ts, _ in cols.values())
+            limit = self.memory_budget * PAGE_CACHE_SHARE
+            with self._page_lock:
+                self._pages[page] = cols
+                self._page_bytes += size
+                while self._page_bytes > limit and len(self._pages) > 1:
+                    _, old = self._pages.popitem(last=False)
+                    self._page_bytes -= sum(len(ts) * 16 for ts, _ in old.values())
+        return cols
+
+    # --- RANGE QUERIES (DISK) ---
+    def read_range(self, t0, t1):
+        """
+        Reads only the rows with t0 <= epoch <= t1 back from disk.
+        Returns {sensor_id: SensorSeries}. Used for windows that are not
+        (or no longer) held in memory.
+        """
+        result = {}
+        if sqlite_log.is_sqlite_log(self.log_file):
+            if not os.path.exists(self.log_file): return result
+            with self.lock:
+                try:
+                    found = sqlite_log.read_range(self._sqlite(), t0, t1)
+                except sqlite3.Error: return result
+            for s_id, (ts, temps) in found.items():
+                result[s_id] = series = SensorSeries()
+                series.extend(ts, temps)
+            return result
+        if binary_log.is_binary_log(self.log_file):
+            try:
+                ids, rows = binary_log.read_range(self.log_file, t0, t1)
+            except (OSError, ValueError): return result
+            for epoch, idx, temp_c in rows:
+                result.setdefault(ids[idx], SensorSeries()).append(epoch, temp_c)
+            return result
+
+        # Start at the last index entry before t0; the log is time-ordered
+        i = bisect_right(self._index_ts, t0) - 1
+        start = self._index_off[i] if i >= 0 else 0
+        try:
+            with open(self.log_file, 'rb') as f:
+                f.seek(start)
+                for raw in f:
+                    if not raw.endswith(b'\n'): break  # Half-written tail
+                    parts = raw.split(b',')
+                    if len(parts) < 3: continue
+                    try:
+                        temp_val = float(parts[2])
+                        x_val = datetime.fromisoformat(parts[0].decode('ascii')).timestamp()
+                    except ValueError: continue
+                    if x_val < t0: continue
+                    if x_val > t1: break
+                    s_id = parts[1].decode('utf-8', errors='replace')
+                    result.setdefault(s_id, SensorSeries()).append(x_val, temp_val)
+        except OSError: pass
+        return result
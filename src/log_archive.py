@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+import os
+import json
+import gzip
+import shutil
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+
+import sqlite_log
+from history_store import HistoryStore
+from decimate import visible_slice
+
+MANIFEST_NAME = 'manifest.json'
+
+
+# --- ROTATED, COMPRESSED LOG SEGMENTS ---
+class LogArchive:
+    """
+    Rotates the live log into gzip-compressed segments under archive_dir.
+    manifest.json records each segment's file, time span, row count and
+    per-sensor min/max (°C), so range queries only open overlapping segments.
+    A reset (mark_reset) is recorded there too: segments that ended before
+    it stay on disk but no query returns them.
+    """
+    def __init__(self, archive_dir, cache_segments=3):
+        self.archive_dir = archive_dir
+        self.manifest_file = os.path.join(archive_dir, MANIFEST_NAME)
+        self.segments = []
+        self.reset_at = None   # Epoch of the last user reset
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()   # segment file -> {sensor_id: SensorSeries}
+        self._cache_segments = cache_segments
+        self._manifest_mtime = None
+        self.load_manifest()
+
+    # --- MANIFEST ---
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_file): return
+        try:
+            self._manifest_mtime = os.path.getmtime(self.manifest_file)
+            with open(self.manifest_file, 'r') as f:
+                manifest = json.load(f)
+            self.segments = manifest.get('segments', [])
+            self.reset_at = manifest.get('reset_at')
+        except Exception as e:
+            print(f"Error loading archive manifest: {e}")
+
+    def reload_if_changed(self):
+        """Picks up segments archived by another process (viewer mode)."""
+        try:
+            mtime = os.path.getmtime(self.manifest_file)
+        except OSError:
+            return
+        if mtime != self._manifest_mtime:
+            with self._lock:
+                self.load_manifest()
+
+    def _save_manifest(self):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        tmp = self.manifest_file + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'segments': self.segments, 'reset_at': self.reset_at}, f, indent=1)
+        os.replace(tmp, self.manifest_file)
+
+    def mark_reset(self, epoch):
+        """Hides every segment that ends before `epoch` from the queries."""
+        with self._lock:
+            self.reset_at = epoch
+            self._save_manifest()
+        self._cache.clear()
+
+    def _visible(self):
+        # Caller holds self._lock
+        if self.reset_at is None: return self.segments
+        return [e for e in self.segments if e['end'] >= self.reset_at]
+
+    def recover(self):
+        """Compresses segments left staged (uncompressed) by an interrupted run."""
+        if not os.path.isdir(self.archive_dir): return
+        for name in sorted(os.listdir(self.archive_dir)):
+            if name.startswith('templog_') and name.endswith(('.csv', '.bin', sqlite_log.DB_EXT)):
+                self.compress_async(os.path.join(self.archive_dir, name))
+
+    # --- ROTATION ---
+    @staticmethod
+    def period_key(epoch, policy):
+        """Calendar period a timestamp belongs to for daily/weekly rotation."""
+        dt = datetime.fromtimestamp(epoch)
+        if policy == 'daily':
+            return dt.strftime('%Y-%m-%d')
+        if policy == 'weekly':
+            year, week, _ = dt.isocalendar()
+            return f"{year}-W{week:02d}"
+        return None
+
+    def should_rotate(self, log_file, first_epoch, now_epoch, policy, max_bytes=None):
+        """True when the live log crossed a day/week boundary or its size limit."""
+        if policy == 'off' or first_epoch is None: return False
+        if max_bytes:
+            try:
+                if os.path.getsize(log_file) >= max_bytes: return True
+            except OSError: return False
+        key = self.period_key(first_epoch, policy)
+        return key is not None and key != self.period_key(now_epoch, policy)
+
+    def detach(self, log_file):
+        """
+        Moves the live log aside (fast, call under the writer lock).
+        Returns the staged path to hand to compress() afterwards.
+        A SQLite log is only moved once its WAL is folded in; otherwise this
+        raises and the log stays where it is.
+        """
+        if sqlite_log.is_sqlite_log(log_file):
+            sqlite_log.fold_wal(log_file)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        ext = os.path.splitext(log_file)[1]
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        staged = os.path.join(self.archive_dir, f"templog_{stamp}{ext}")
+        os.replace(log_file, staged)
+        return staged
+
+    def compress(self, staged):
+        """Summarises and gzips a detached segment, then records it in the manifest."""
+        try:
+            seg = HistoryStore(staged)
+            seg.refresh()
+            seg.close()
+            sensors, start, end, rows = {}, None, None, 0
+            for s_id in seg.sensor_ids():
+                series = seg.get_series(s_id)
+                if not len(series): continue
+                sensors[s_id] = [series.min_c, series.max_c]
+                start = series.ts[0] if start is None else min(start, series.ts[0])
+                end = series.ts[-1] if end is None else max(end, series.ts[-1])
+                rows += len(series)
+
+            if rows == 0:
+                self._remove(staged)
+                return None
+
+            target = staged + '.gz'
+            with open(staged, 'rb') as src, gzip.open(target, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            self._remove(staged)
+
+            entry = {'file': os.path.basename(target), 'start': start, 'end': end,
+                     'rows': rows, 'sensors': sensors}
+            with self._lock:
+                self.segments.append(entry)
+                self.segments.sort(key=lambda e: e['start'])
+                self._save_manifest()
+            print(f"Archived log segment {entry['file']} ({rows} rows)")
+            return entry
+        except Exception as e:
+            print(f"Error archiving log segment: {e}")
+            return None
+
+    @staticmethod
+    def _remove(path):
+        if sqlite_log.is_sqlite_log(path):
+            sqlite_log.remove_log(path)
+        else:
+            os.remove(path)
+
+    def compress_async(self, staged):
+        threading.Thread(target=self.compress, args=(staged,), name="LogArchive", daemon=True).start()
+
+    # --- QUERIES ---
+    def overlapping(self, t0, t1):
+        """Manifest entries whose time span intersects t0..t1."""
+        with self._lock:
+            return [e for e in self._visible() if e['end'] >= t0 and e['start'] <= t1]
+
+    def sensor_range(self, sensor_id):
+        """All-time (min, max) °C across archived segments, or None."""
+        lo = hi = None
+        with self._lock:
+            for e in self._visible():
+                mm = e['sensors'].get(sensor_id)
+                if not mm: continue
+                lo = mm[0] if lo is None else min(lo, mm[0])
+                hi = mm[1] if hi is None else max(hi, mm[1])
+        return None if lo is None else (lo, hi)
+
+    def earliest(self):
+        with self._lock:
+            segments = self._visible()
+            return segments[0]['start'] if segments else None
+
+    def load_segment(self, entry):
+        """Decompresses and parses one segment (small LRU cache of recent ones)."""
+        name = entry['file']
+        if name in self._cache:
+            self._cache.move_to_end(name)
+            return self._cache[name]
+
+        path = os.path.join(self.archive_dir, name)
+        ext = os.path.splitext(name[:-3])[1]
+        fd, tmp = tempfile.mkstemp(suffix=ext, dir=self.archive_dir)
+        try:
+            with os.fdopen(fd, 'wb') as dst, gzip.open(path, 'rb') as src:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            seg = HistoryStore(tmp)
+            seg.refresh()
+            seg.close()
+            data = {s_id: seg.get_series(s_id) for s_id in seg.sensor_ids()}
+        finally:
+            self._remove(tmp)
+
+        self._cache[name] = data
+        while len(self._cache) > self._cache_segments:
+            self._cache.popitem(last=False)
+        return data
+
+    def read_range(self, sensor_id, t0, t1):
+        """
+        Archived samples for one sensor in t0..t1 as (ts, temps) arrays,
+        opening only the segments the manifest says overlap the window.
+        """
+        ts, temps = array('d'), array('d')
+        for entry in self.overlapping(t0, t1):
+            if sensor_id not in entry['sensors']: continue
+            series = self.load_segment(entry).get(sensor_id)
+            if series is None: continue
+            lo, hi = visible_slice(series.ts, t0, t1)
+            ts.extend(series.ts[lo:hi])
+            temps.extend(series.temps[lo:hi])
+        return ts, temps
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+import io
+import os
+import csv
+import time
+import threading
+from datetime import datetime
+
+import binary_log
+import sqlite_log
+from profiler import profiler
+
+CSV_TIME_FMT = "%Y-%m-%d %H:%M:%S"
+
+
+def csv_timestamp(epoch):
+    """Local 'YYYY-MM-DD HH:MM:SS.mmm' (millisecond resolution)."""
+    ms = round(epoch * 1000)
+    return f"{datetime.fromtimestamp(ms // 1000).strftime(CSV_TIME_FMT)}.{ms % 1000:03d}"
+
+
+# --- BATCHED BACKGROUND WRITER ---
+class LogWriter:
+    """
+    Queues (epoch, sensor_id, temp_c) rows and appends them to the log from
+    a background thread in batches, instead of an open/append/close per tick.
+
+    Durability policy:
+        flush_rows     flush once this many rows are queued
+        flush_seconds  flush at least this often while rows are queued
+        fsync          os.fsync() after every flush (slower, survives power loss)
+
+    `lock` (shared with the HistoryStore) is held while bytes hit the file,
+    and `on_flush(nbytes)` is called under it so the store can skip rows it
+    already holds in memory (for a SQLite log, nbytes is the row count).
+    """
+    def __init__(self, path, flush_rows=20, flush_seconds=60.0, fsync=False,
+                 lock=None, on_flush=None):
+        self.path = path
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_seconds = max(0.1, float(flush_seconds))
+        self.fsync = fsync
+        self.on_flush = on_flush
+        self._file_lock = lock if lock is not None else threading.RLock()
+        self._queue = []
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._handle = None
+        self._db = None
+        self._last_flush = time.monotonic()
+
+    @property
+    def is_binary(self):
+        return binary_log.is_binary_log(self.path)
+
+    @property
+    def is_sqlite(self):
+        return sqlite_log.is_sqlite_log(self.path)
+
+    def persisted_epoch(self, epoch):
+        """Epoch as it will read back from disk (CSV keeps milliseconds)."""
+        if self.is_binary or self.is_sqlite: return epoch
+        ms = round(epoch * 1000)
+        # Same arithmetic as datetime.timestamp() on the parsed text
+        return (ms // 1000) + (ms % 1000) * 1000 / 1e6
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stops the thread and flushes everything still queued."""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        self._close_handle()
+
+    def reopen(self):
+        """Closes the cached handle (checkpointing a SQLite log) so the next
+        batch opens the (new) log file.
+        Call while holding the shared file lock, e.g. around a rotation."""
+        with self._file_lock:
+            self._close_handle()
+
+    def write(self, rows):
+        if not rows: return
+        with self._cond:
+            self._queue.extend(rows)
+            if len(self._queue) >= self.flush_rows:
+                self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return len(self._queue)
+
+    def flush(self):
+        """Writes all queued rows now. Safe to call from any thread."""
+        # Taking the queue under the file lock keeps take/write/on_flush atomic
+        # for whoever else holds that lock (e.g. the history load)
+        with self._file_lock:
+            with self._cond:
+                rows, self._queue = self._queue, []
+            self._last_flush = time.monotonic()
+            if not rows: return
+            try:
+                nbytes = self._write_batch(rows)
+                if self.on_flush:
+                    self.on_flush(nbytes)
+            except Exception as e:
+                print(f"Error writing log batch: {e}")
+
+    @profiler.timed('log_write')
+    def _write_batch(self, rows):
+        if self.is_sqlite:
+            # One transaction per batch on a connection kept open between batches
+            if self._db is None:
+                self._db = sqlite_log.connect(self.path, synchronous='FULL' if self.fsync else 'NORMAL')
+            return sqlite_log.append_records(self._db, rows)
+
+        if self.is_binary:
+            before = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            binary_log.append_records(self.path, rows)
+            if self.fsync:
+                with open(self.path, 'rb+') as f:
+                    os.fsync(f.fileno())
+            return os.path.getsize(self.path) - max(before, binary_log.HEADER_SIZE)
+
+        buf = io.StringIO()
+        csv.writer(buf).writerows(
+            [csv_timestamp(epoch), s_id, temp_c]
+            for epoch, s_id, temp_c in rows)
+        data = buf.getvalue().encode('utf-8')
+
+        # Kept open between batches; O_APPEND still lands at the end after a reset
+        if self._handle is None or self._handle.closed:
+            self._handle = open(self.path, 'ab')
+        self._handle.write(data)
+        self._handle.flush()
+        if self.fsync:
+            os.fsync(self._handle.fileno())
+        return len(data)
+
+    def _close_handle(self):
+        if self._db is not None:
+            try:
+                sqlite_log.close(self._db)
+            except Exception: pass
+            self._db = None
+        if self._handle is not None:
+            try:
+                self._handle.close()
+            except Exception: pass
+            self._handle = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            with self._cond:
+                timeout = self.flush_seconds - (time.monotonic() - self._last_flush)
+                if len(self._queue) < self.flush_rows and timeout > 0:
+                    self._cond.wait(timeout)
+                due = (len(self._queue) >= self.flush_rows or
+                       time.monotonic() - self._last_flush >= self.flush_seconds)
+            if due and not self._stop_event.is_set():
+                self.flush()
@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Headless logging service: sensor polling, batched log writing, rollups,
+streaming stats and log rotation, with no Kivy import.
+
+Usage:
+    python logger_service.py
+    python main.py --headless
+
+While the service holds data/logger.lock, the GUI attaches as a read-only
+viewer: it tails the log the service writes and shows the live readings
+the service publishes to tempmonitor_live.json.
+"""
+import os
+import sys
+import json
+import math
+import time
+import fcntl
+import signal
+import threading
+
+from settings_manager import settings
+from sensor_reader import sensor_backend, SensorPoller, make_bulk_reader
+from history_store import HistoryStore
+from rollups import RollupStore
+from rolling_stats import StatsTracker
+from log_writer import LogWriter
+from log_archive import LogArchive
+from sample_scheduler import SampleScheduler
+from profiler import profiler
+
+# Progressive history load: bytes parsed per lock hold
+LOAD_CHUNK_BYTES = 1024 * 1024
+# Headless: how often saved settings (e.g. the log interval) are re-read
+SETTINGS_POLL_SECONDS = 5.0
+# Longest gap between sensor polls (display refresh when logging is slower)
+DISPLAY_POLL_SECONDS = 2.0
+
+
+# --- SINGLE LOGGER GUARD ---
+class ProcessLock:
+    """Advisory flock so only one process (GUI or service) writes the log."""
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def acquire(self):
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as e:
+            print(f"Error opening lock file: {e}")
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None: return
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        except OSError: pass
+        self._fd = None
+
+
+# --- LOGGING PIPELINE ---
+class LoggerService:
+    """
+    Everything that turns sensor readings into stored history, shared by
+    the GUI and the headless service. read_only=True builds the same
+    stores but never polls sensors or writes files (viewer mode).
+    `sensors` overrides bus discovery (e.g. a set of mock probes).
+    """
+    def __init__(self, settings, read_only=False, publish_live=False, sensors=None):
+        self.settings = settings
+        self.read_only = read_only
+        self.publish_live = publish_live
+        settings.ensure_data_dir()
+
+        on_pi = False
+        if read_only:
+            self.sensors = []
+        elif sensors is not None:
+            self.sensors = list(sensors)
+        else:
+            sensor_cls, on_pi = sensor_backend()
+            self.sensors = sensor_cls.get_available_sensors()
+        sensor_ids = [s.id for s in self.sensors]
+
+        # Incremental history parsed from the log; past the memory budget the
+        # oldest samples are evicted and paged back from disk when charted
+        budget_mb = settings.get('history_memory_mb')
+        self.history = HistoryStore(settings.log_file, sensor_ids,
+                                    memory_budget=budget_mb * 1024 * 1024 if budget_mb else None)
+        # Persisted 1 min / 15 min / 1 h aggregates for long-range charting
+        # (tier files are parsed with the history, off the startup path)
+        self.rollups = RollupStore(settings.rollup_dir, read_only=read_only)
+        # Streaming all-time / 1 h / 24 h statistics per sensor (in °C)
+        self.stats = StatsTracker()
+        # Rotated, compressed log segments + manifest
+        self.archive = LogArchive(settings.archive_dir)
+
+        self.poller = None
+        self.log_writer = None
+        # Alert rules, evaluated on each poll by the logging process
+        self.alerts = None
+        if not read_only and settings.get('alerts'):
+            from alerts import AlertEngine
+            self.alerts = AlertEngine.from_settings(
+                settings, on_change=self._publish_alerts if publish_live else None)
+        if not read_only:
+            # All probes convert at once via therm_bulk_read when available
+            bulk = None
+            if on_pi:
+                bulk = make_bulk_reader(self.sensors, settings.get('w1_resolution'))
+                if not settings.get('w1_bulk_read'): bulk = None
+            # Background acquisition: one read per probe serves display + logger
+            self.poller = SensorPoller(self.sensors, poll_interval=self._poll_period(self.interval_seconds),
+                                       on_update=self._on_poll if publish_live or self.alerts else None,
+                                       bulk=bulk,
+                                       read_timeout=settings.get('w1_read_timeout'),
+                                       retries=settings.get('w1_read_retries'))
+            # Batched background writer; flushed bytes are skipped by the history store
+            self.log_writer = LogWriter(settings.log_file,
+                                        flush_rows=settings.get('log_flush_rows'),
+                                        flush_seconds=settings.get('log_flush_seconds'),
+                                        fsync=settings.get('log_fsync'),
+                                        lock=self.history.lock,
+                                        on_flush=self._on_flush)
+        self._segment_first = None
+        # False while the log is parsed in the background (start(background_load=True))
+        self.loaded = True
+        self._load_thread = None
+        self._stopping = False
+        # Called with the rows of every log tick (local API stream, etc.)
+        self.listeners = []
+        # Wall-clock aligned sampling clock (start_sampling)
+        self.scheduler = None
+        self.api = None
+        if not read_only and settings.get('api_enabled'):
+            from stream_api import StreamServer  # http.server only when the API is on
+            self.api = StreamServer(self, host=settings.get('api_host'), port=settings.get('api_port'))
+            self.listeners.append(self.api.publish_rows)
+
+    @property
+    def sensor_ids(self):
+        if self.sensors:
+            return [s.id for s in self.sensors]
+        return self.history.sensor_ids()
+
+    @property
+    def interval_seconds(self):
+        factor = 60.0 if self.settings.get('frequency_unit') == 'min' else 1.0
+        return self.settings.get('log_interval') * factor
+
+    def start(self, background_load=False, on_progress=None):
+        """
+        background_load=True returns at once: sensors and the writer start
+        right away while the existing log is parsed on a thread in chunks,
+        calling on_progress(done) after each one (from that thread).
+        """
+        self._stopping = False
+        if background_load:
+            self.loaded = False
+            self._load_thread = threading.Thread(target=self._load_history, args=(on_progress,),
+                                                 name="HistoryLoad", daemon=True)
+            self._load_thread.start()
+        else:
+            self.sync()
+            # Start of the live log segment (for daily/weekly rotation)
+            self._segment_first = self.history.log_first_epoch()
+        if self.read_only: return
+        self.archive.recover()
+        if self.alerts:
+            self.alerts.start()
+            if self.publish_live: self._publish_alerts([])
+        self.poller.start()
+        self.log_writer.start()
+        if self.api:
+            try:
+                self.api.start()
+            except OSError as e:
+                print(f"Error starting local API: {e}")
+                self.api = None
+
+    def stop(self):
+        self._stopping = True
+        if self.scheduler: self.scheduler.stop()
+        if self._load_thread:
+            self._load_thread.join(5.0)
+            self._load_thread = None
+        if self.api: self.api.stop()
+        if self.poller: self.poller.stop()
+        if self.alerts:
+            self.alerts.stop()
+            if self.publish_live: self._publish_alerts([])
+        if self.log_writer: self.log_writer.stop()
+
+    def flush(self):
+        if self.log_writer: self.log_writer.flush()
+
+    # --- SAMPLING CLOCK ---
+    def start_sampling(self, on_tick=None, first_after=0.0):
+        """
+        Ticks on the wall-clock boundaries of the log interval from a
+        scheduler thread. on_tick(target) defaults to sample_tick; the GUI
+        passes its own to hand the logging to the Kivy thread. Either way
+        it returns the epoch the sample was acquired.
+        """
+        if self.scheduler: self.scheduler.stop()
+        interval = self.interval_seconds
+        if self.poller: self.poller.set_poll_interval(self._poll_period(interval))
+        self.scheduler = SampleScheduler(interval, on_tick or self.sample_tick)
+        self.scheduler.start(first_after)
+
+    def set_sample_interval(self, seconds):
+        if self.poller: self.poller.set_poll_interval(self._poll_period(seconds))
+        if self.scheduler: self.scheduler.set_interval(seconds)
+
+    @staticmethod
+    def _poll_period(interval):
+        """Largest poll period <= DISPLAY_POLL_SECONDS that divides the log
+        interval, so every sample boundary is also a poll boundary."""
+        return interval / math.ceil(interval / DISPLAY_POLL_SECONDS)
+
+    def acquire(self, target):
+        """
+        Fresh readings for the sample due at `target`: the poll started on
+        that boundary. Returns (acquired epoch, snapshot); the snapshot is
+        None in viewer mode (nothing to acquire).
+        """
+        if not self.poller:
+            return time.time(), None
+        snapshot, done = self.poller.acquire(target, timeout=self.poller.read_timeout + 1.0)
+        return (done if done is not None else time.time()), snapshot
+
+    def sample_tick(self, target):
+        """Scheduler tick: one acquisition, logged at its own timestamp."""
+        acquired, snapshot = self.acquire(target)
+        self.log_tick(acquired, snapshot)
+        return acquired
+
+    def get_timing(self):
+        """Sampling lateness (ms) and missed ticks, or {} before sampling started."""
+        return self.scheduler.stats() if self.scheduler else {}
+
+    # --- READINGS ---
+    def get_snapshot(self):
+        """{sensor_id: (temp_c, epoch)} from our poller, or from the logger's live file."""
+        if self.poller:
+            return self.poller.get_snapshot()
+        try:
+            with open(self.settings.live_file, 'r') as f:
+                return {k: tuple(v) for k, v in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def get_health(self):
+        """{sensor_id: read health counters} from our poller, or from the logger's health file."""
+        if self.poller:
+            return self.poller.get_health()
+        try:
+            with open(self.settings.health_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get_alerts(self):
+        """Active banner alerts from our engine, or from the logger's alerts file."""
+        if self.alerts:
+            return self.alerts.active()
+        if not self.read_only:
+            return []
+        try:
+            with open(self.settings.alerts_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _on_poll(self, snapshot):
+        # Poller thread, after every poll
+        if self.alerts: self.alerts.on_snapshot(snapshot)
+        if self.publish_live: self._publish_live(snapshot)
+
+    def _publish_live(self, snapshot):
+        for path, payload in ((self.settings.live_file, snapshot),
+                              (self.settings.health_file, self.poller.get_health())):
+            self._write_json(path, payload)
+
+    def _publish_alerts(self, active):
+        self._write_json(self.settings.alerts_file, active)
+
+    @staticmethod
+    def _write_json(path, payload):
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+
+    # --- HISTORY LOAD ---
+    def _load_history(self, on_progress):
+        t0 = time.perf_counter()
+        try:
+            # Rollup tiers are parsed here too, not before the first frame
+            self.rollups.load()
+            self._consume_backlog(on_progress, progressive=True)
+            # Last chunk under the store lock, so ticks logged meanwhile (written
+            # to disk but not ingested) are read back exactly once
+            with self.history.lock:
+                self.flush()
+                self.history.refresh()
+                self._consume()
+                self._segment_first = self.history.log_first_epoch()
+                self.loaded = True
+        except Exception as e:
+            print(f"Error loading history: {e}")
+            self.loaded = True
+        profiler.mark('history loaded')
+        print(f"History loaded in {time.perf_counter() - t0:.2f}s (background)")
+        if on_progress: on_progress(True)
+
+    def _consume_backlog(self, on_progress=None, progressive=False):
+        """
+        Parses the backlog in LOAD_CHUNK_BYTES chunks: always when progressive
+        (one short lock hold per chunk), otherwise only while the rest would
+        not fit the memory budget. What is left goes to the caller's refresh()
+        in one batch, so stats and rollups see it at once.
+        """
+        while self.history.backlog() > LOAD_CHUNK_BYTES and not self._stopping:
+            if not progressive and self.history.backlog_fits(): return
+            self.history.refresh(max_bytes=LOAD_CHUNK_BYTES)
+            self._consume()
+            if on_progress: on_progress(False)
+
+    def _consume(self):
+        """Feeds new samples to rollups and stats, then enforces the memory budget
+        (shared by the samples, the stats windows and the rollups)."""
+        self.rollups.catch_up(self.history)
+        self.stats.catch_up(self.history)
+        self.history.reserved = self.stats.memory_bytes() + self.rollups.memory_bytes()
+        self.history.evict()
+
+    def _on_flush(self, nbytes):
+        # Rows logged before the load finished were not ingested: leave them to refresh()
+        if self.loaded:
+            self.history.mark_appended(nbytes)
+
+    # --- LOGGING ---
+    @profiler.timed('history_sync')
+    def sync(self):
+        """Pulls newly logged rows into the store, then feeds rollups and stats
+        with just those samples."""
+        if not self.loaded: return  # The load thread is still catching up
+        self._consume_backlog()
+        self.history.refresh()
+        self._consume()
+        # Windows of a sensor that stopped reporting still age out
+        self.stats.evict(time.time())
+        if self.read_only:
+            self.archive.reload_if_changed()
+
+    @profiler.timed('log_tick')
+    def log_tick(self, now_epoch=None, snapshot=None):
+        """Logs `snapshot` (default: the latest one). Returns the rows logged (epoch, sensor_id, temp_c)."""
+        if self.read_only:
+            self.sync()
+            return []
+        if now_epoch is None:
+            now_epoch = time.time()
+        # Same resolution the log keeps, so memory matches what reads back from disk
+        logged_x = self.log_writer.persisted_epoch(now_epoch)
+
+        # Latest values from the acquisition thread (no blocking 1-Wire reads here)
+        if snapshot is None:
+            snapshot = self.poller.get_snapshot()
+        # A probe that stopped answering is not logged with its last old value
+        max_age = max(10.0, 3 * self.poller.poll_interval)
+        rows = []
+        for sensor in self.sensors:
+            reading = snapshot.get(sensor.id)
+            if reading is None or now_epoch - reading[1] > max_age: continue
+            rows.append((logged_x, sensor.id, reading[0]))
+
+        # Memory first, disk in batches from the writer thread
+        with self.history.lock:
+            if self.loaded:
+                self.history.ingest(rows)
+            self.log_writer.write(rows)
+        self.check_rotation(logged_x)
+        self.sync()
+        for listener in self.listeners:
+            try:
+                listener(rows)
+            except Exception as e:
+                print(f"Error in log listener: {e}")
+        return rows
+
+    # --- ROTATION / RESET ---
+    def check_rotation(self, now_epoch):
+        if not self.loaded: return
+        if self._segment_first is None:
+            self._segment_first = now_epoch
+        max_mb = self.settings.get('log_rotate_mb')
+        if self.archive.should_rotate(self.settings.log_file, self._segment_first, now_epoch,
+                                      self.settings.get('log_rotation'),
+                                      max_bytes=max_mb * 1024 * 1024 if max_mb else None):
+            self.rotate_log()
+
+    def rotate_log(self):
+        """Moves the live log into the archive and starts a new segment.
+        In-memory history is kept; compression runs in the background."""
+        if self.read_only: return
+        try:
+            self.log_writer.flush()
+            with self.history.lock:
+                self.log_writer.reopen()
+                # A SQLite log must have no open connections before it moves
+                self.history.close()
+                staged = self.archive.detach(self.settings.log_file)
+                self.settings.reset_log()
+                self.history.rebase()
+            self.archive.compress_async(staged)
+            self._segment_first = None
+        except Exception as e:
+            print(f"Error rotating log: {e}")
+
+    def reset(self):
+        """Archives the current segment and starts over with empty history."""
+        if self.read_only or not self.loaded: return False
+        self.rotate_log()
+        # Archived segments stay on disk, but charts and ranges start over
+        self.archive.mark_reset(time.time())
+        with self.history.lock:
+            self.history.clear()
+            self.history.refresh()
+        self.rollups.clear()
+        self.stats.clear()
+        return True
+
+
+# --- HEADLESS ENTRY POINT ---
+def run_headless():
+    lock = ProcessLock(settings.lock_file)
+    settings.ensure_data_dir()
+    if not lock.acquire():
+        print("Another TempMonitor logger is already running.")
+        return 1
+
+    if settings.get('profiling'):
+        profiler.enabled = True
+    service = LoggerService(settings, publish_live=True)
+    stop_event = threading.Event()
+
+    def _stop(signum, frame):
+        print(f"Signal {signum} received, stopping logger...")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    service.start()
+    interval = service.interval_seconds
+    print(f"Headless logger running: every {interval}s -> {settings.log_file}")
+
+    # Samples are logged from the scheduler thread; let the first poll land first
+    service.start_sampling(first_after=min(interval, 2.5))
+    try:
+        while not stop_event.wait(SETTINGS_POLL_SECONDS):
+            # Pick up interval changes saved by the GUI
+            if settings.reload_if_changed() and service.interval_seconds != interval:
+                interval = service.interval_seconds
+                service.set_sample_interval(interval)
+                print(f"Log interval changed to {interval}s")
+    finally:
+        service.stop()
+        lock.release()
+        print(service.scheduler.format_stats())
+        if profiler.enabled:
+            path = os.path.join(settings.data_dir, 'diagnostics_headless.json')
+            print(f"Timings written to {profiler.dump(path, extra={'sample_timing': service.get_timing()})}")
+        print("Headless logger stopped.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run_headless())
@@ -1,69 +1,22 @@
 #!/usr/bin/env python3
 import os
-import json
-import csv
-import time
 import sys
+import signal
 import threading
 import subprocess
 from datetime import datetime
-from random import uniform
 
-# --- 1. SETTINGS MANAGER & CONFIGURATION ---
-class SettingsManager:
-    def __init__(self):
-        self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.data_dir = os.path.join(self.base_dir, 'data')
-        self.csv_file = os.path.join(self.data_dir, 'templog.csv')
-        self.settings_file = os.path.join(self.data_dir, 'tempmonitor_settings.json')
-        
-        # Default Settings
-        self.defaults = {
-            'window_width': 480,
-            'window_height': 258,
-            'window_top': None,
-            'window_left': None,
-            'units': 'C',          # 'C' or 'F'
-            'frequency_unit': 'min', # 'sec' or 'min'
-            'log_interval': 5,     
-            'sensor_map': {}      
-        }
-        self.data = self.defaults.copy()
-        self.load()
-
-    def load(self):
-        if os.path.exists(self.settings_file):
-            try:
-                with open(self.settings_file, 'r') as f:
-                    saved = json.load(f)
-                    self.data.update(saved)
-            except Exception as e:
-                print(f"Error loading settings: {e}")
-
-    def save(self):
-        self.ensure_data_dir()
-        try:
-            with open(self.settings_file, 'w') as f:
-                json.dump(self.data, f, indent=4)
-            print(f"Settings saved.")
-        except Exception as e:
-            print(f"Error saving settings: {e}")
+# Startup milestones (printed once the first frame is drawn)
+from profiler import profiler
 
-    def get(self, key):
-        return self.data.get(key, self.defaults.get(key))
-
-    def set(self, key, value):
-        self.data[key] = value
-
-    def ensure_data_dir(self):
-        if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
-        if not os.path.exists(self.csv_file):
-            with open(self.csv_file, 'w', newline='') as f:
-                csv.writer(f).writerow(['timestamp', 'sensor_id', 'temperature'])
+# --- 1. SETTINGS MANAGER & CONFIGURATION ---
+from settings_manager import settings
+profiler.mark('settings')
 
-# Instantiate Global Manager
-settings = SettingsManager()
+# --- HEADLESS MODE (no Kivy import at all) ---
+if __name__ == '__main__' and '--headless' in sys.argv:
+    from logger_service import run_headless
+    sys.exit(run_headless())
 
 # --- 2. APPLY WINDOW SETTINGS (PRE-KIVY) ---
 # This prevents the startup flash and handles the restore logic
@@ -109,36 +62,94 @@ if top is not None and left is not None:
 from kivy.app import App
 from kivy.lang import Builder
 from kivy.core.window import Window
-from kivy.properties import ObjectProperty, StringProperty, NumericProperty, ListProperty, BooleanProperty
+from kivy.properties import StringProperty, NumericProperty, ListProperty, BooleanProperty
 from kivy.clock import Clock
-from kivy.uix.screenmanager import ScreenManager, Screen, SlideTransition
-from kivy_garden.graph import Graph, MeshLinePlot 
-
-# --- SENSOR HANDLING ---
-try:
-    from w1thermsensor import W1ThermSensor
-    if not W1ThermSensor.get_available_sensors():
-        raise ImportError("No sensors found")
-    IS_RASPBERRY_PI = True
-except Exception:
-    IS_RASPBERRY_PI = False
-    print("Using MOCK SENSORS")
-    class W1ThermSensor:
-        def __init__(self, sensor_id=None):
-            self.id = sensor_id or "28-00000TEST"
-        @staticmethod
-        def get_available_sensors():
-            return [W1ThermSensor("28-MockProd"), W1ThermSensor("28-MockAmb")]
-        def get_temperature(self):
-            return round(uniform(20.0, 30.0), 2)
+from kivy.uix.screenmanager import Screen, SlideTransition
+from kivy.uix.boxlayout import BoxLayout
+from kivy_garden.graph import Graph
+profiler.mark('kivy')
+
+# --- LOGGING PIPELINE ---
+from bisect import bisect_left, bisect_right
+from decimate import minmax_decimate
+from ring_plot import RingLinePlot
+from logger_service import LoggerService, ProcessLock
+from sensor_registry import SensorRegistry
+from sensor_health import format_health
+profiler.mark('app modules')
+
+# More new samples than this per tick (e.g. a viewer catching up) redraw instead of appending
+MAX_LIVE_APPEND = 256
+
+# Selectable chart windows in seconds (None = entire history)
+CHART_WINDOWS = {'1h': 3600, '6h': 6 * 3600, '24h': 24 * 3600, '7d': 7 * 24 * 3600, 'all': None}
 
 # --- CUSTOM RESPONSIVE GRAPH ---
 class ResponsiveGraph(Graph):
+    """Graph with drag-to-pan, pinch / scroll-wheel zoom on the X (time) axis.
+    Fires on_view_change when the user moves the visible window."""
     def __init__(self, **kwargs):
+        self.register_event_type('on_view_change')
         super().__init__(**kwargs)
+        self._touches = []
         self._trigger_font_update = Clock.create_trigger(self.update_fonts, 0.1)
         self.bind(height=self._trigger_font_update)
         Clock.schedule_once(self.update_fonts, 0.5)
+
+    def on_view_change(self, *args):
+        pass
+
+    def set_x_window(self, xmin, xmax):
+        if xmax - xmin < 10: return  # Don't zoom below 10 seconds
+        self.xmin = xmin
+        self.xmax = xmax
+        self.x_ticks_major = max(1, (xmax - xmin) / 6)
+
+    def _x_at(self, px):
+        """Epoch value under a window x coordinate."""
+        frac = (px - self.x) / max(1, self.width)
+        return self.xmin + frac * (self.xmax - self.xmin)
+
+    def zoom_x(self, factor, anchor_px):
+        anchor = self._x_at(anchor_px)
+        self.set_x_window(anchor - (anchor - self.xmin) * factor,
+                          anchor + (self.xmax - anchor) * factor)
+        self.dispatch('on_view_change')
+
+    def on_touch_down(self, touch):
+        if not self.collide_point(*touch.pos):
+            return super().on_touch_down(touch)
+        if getattr(touch, 'is_mouse_scrolling', False):
+            self.zoom_x(0.8 if touch.button == 'scrolldown' else 1.25, touch.x)
+            return True
+        touch.grab(self)
+        self._touches.append(touch)
+        return True
+
+    def on_touch_move(self, touch):
+        if touch.grab_current is not self:
+            return super().on_touch_move(touch)
+        if len(self._touches) == 1:
+            # Drag: shift the window by the finger's travel in data units
+            shift = touch.dx * (self.xmax - self.xmin) / max(1, self.width)
+            self.set_x_window(self.xmin - shift, self.xmax - shift)
+            self.dispatch('on_view_change')
+        elif len(self._touches) == 2:
+            # Pinch: scale the span by the change in finger distance
+            a, b = self._touches
+            prev = abs(a.px - b.px)
+            cur = abs(a.x - b.x)
+            if prev > 5 and cur > 5:
+                self.zoom_x(prev / cur, (a.x + b.x) / 2)
+        return True
+
+    def on_touch_up(self, touch):
+        if touch.grab_current is not self:
+            return super().on_touch_up(touch)
+        touch.ungrab(self)
+        if touch in self._touches:
+            self._touches.remove(touch)
+        return True
         
     def update_fonts(self, *args):
         if self.height < 10: return
@@ -150,6 +161,14 @@ class ResponsiveGraph(Graph):
         }
 
 # --- SCREENS ---
+class SensorCard(BoxLayout):
+    """Live reading + range for one probe on the monitor screen."""
+    sensor_id = StringProperty("")
+    sensor_name = StringProperty("")
+    temp_text = StringProperty("--.-")
+    range_text = StringProperty("Range: --.- - --.-")
+    color = ListProperty([1, 1, 1, 1])
+
 class MonitorScreen(Screen):
     pass
 
@@ -176,6 +195,12 @@ class SettingsMasterScreen(Screen):
             self.btn_3_visible = True
             self.btn_4_text = "RESTART"
             self.btn_4_visible = True
+        elif tab_name == 'settings_diagnostics':
+            self.btn_3_text = "DUMP"
+            self.btn_3_visible = True
+            self.btn_4_text = "CLEAR"
+            self.btn_4_visible = True
+            self.ids.content_manager.get_screen(tab_name).refresh()
         else:
             self.btn_3_visible = False
             self.btn_4_visible = False
@@ -195,16 +220,32 @@ class SettingsMasterScreen(Screen):
                 screen.check_updates()
             elif self.btn_3_text == "INSTALL":
                 screen.install_updates()
+        elif self.current_tab == 'settings_diagnostics':
+            self.ids.content_manager.get_screen('settings_diagnostics').dump()
 
     def on_btn_4(self):
         # Slot 4: RESTART
         if self.current_tab == 'settings_updates':
             screen = self.ids.content_manager.get_screen('settings_updates')
             screen.restart_app()
+        elif self.current_tab == 'settings_diagnostics':
+            profiler.reset()
+            self.ids.content_manager.get_screen('settings_diagnostics').refresh()
 
 class GeneralSettingsScreen(Screen):
     pass
 
+class SensorSettingsRow(BoxLayout):
+    """Name / color / visibility editor for one probe."""
+    sensor_id = StringProperty("")
+    sensor_name = StringProperty("")
+    color = ListProperty([1, 1, 1, 1])
+    show = BooleanProperty(True)
+    health_text = StringProperty("No reads yet")
+
+class SensorsSettingsScreen(Screen):
+    pass
+
 class UpdatesSettingsScreen(Screen):
     log_text = StringProperty("Ready to check for updates.\n")
     is_working = BooleanProperty(False)
@@ -303,17 +344,51 @@ class UpdatesSettingsScreen(Screen):
         cmd_args = [python, script] + args
         os.execv(python, cmd_args)
 
+class DiagnosticsSettingsScreen(Screen):
+    """Hot-path timings (p50/p95/max per stage) and frame times."""
+    report_text = StringProperty("")
+    profiling = BooleanProperty(profiler.enabled)
+
+    def on_enter(self):
+        self.profiling = profiler.enabled
+        self.refresh()
+        self._refresh_event = Clock.schedule_interval(self.refresh, 2)
+
+    def on_leave(self):
+        if getattr(self, '_refresh_event', None):
+            self._refresh_event.cancel()
+
+    def refresh(self, *args):
+        if not profiler.enabled and not profiler.summary():
+            self.report_text = ("Profiling is off. Turn it on to time the hot paths.\n\n"
+                                + profiler.format_startup() + "\n\n" + self._format_timing())
+            return
+        self.report_text = profiler.format_table() + "\n\n" + self._format_timing()
+
+    @staticmethod
+    def _format_timing():
+        scheduler = App.get_running_app().service.scheduler
+        return scheduler.format_stats() if scheduler else ""
+
+    def dump(self):
+        app = App.get_running_app()
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(settings.data_dir, f"diagnostics_{stamp}.json")
+        try:
+            profiler.dump(path, extra={'read_health': app.service.get_health(),
+                                       'history_bytes': app.history.memory_bytes(),
+                                       'page_cache_bytes': app.history.page_cache_bytes(),
+                                       'sample_timing': app.service.get_timing()})
+            self.report_text = f"Saved {path}\n\n" + profiler.format_table()
+        except Exception as e:
+            self.report_text = f"Error writing diagnostics: {e}"
+
 class AboutScreen(Screen):
     pass
 
 
 # --- MAIN APP ---
 class TempMonitorApp(App):
-    product_temp = StringProperty("--.-")
-    ambient_temp = StringProperty("--.-")
-    product_range = StringProperty("Range: --.- - --.-")
-    ambient_range = StringProperty("Range: --.- - --.-")
-    
     sensor_ids = ListProperty([])
     
     # Settings Properties
@@ -321,6 +396,13 @@ class TempMonitorApp(App):
     frequency_unit = StringProperty(settings.get('frequency_unit'))
     log_interval = NumericProperty(settings.get('log_interval')) 
     
+    # Chart window ('1h', '6h', '24h', '7d', 'all') and live-follow state
+    chart_window = StringProperty('all')
+    chart_follow_live = BooleanProperty(True)
+    
+    # Active alerts ('banner' action), one line each; empty hides the banner
+    alert_text = StringProperty("")
+    
     # Reset Button Properties
     reset_btn_text = StringProperty("RESET CSV DATA")
     reset_btn_color = ListProperty([0.8, 0.2, 0.2, 1])
@@ -332,17 +414,38 @@ class TempMonitorApp(App):
 
     def build(self):
         settings.ensure_data_dir()
+        if settings.get('profiling'):
+            profiler.enabled = True
         self.root = Builder.load_file('app_layout.kv')
         
-        # Initialize Sensors
-        self.sensors = W1ThermSensor.get_available_sensors()
-        self.sensor_ids = [s.id for s in self.sensors]
+        # Log ourselves unless a headless logger already holds the lock,
+        # in which case attach to its data as a read-only viewer
+        self.logger_lock = ProcessLock(settings.lock_file)
+        self.is_viewer = not self.logger_lock.acquire()
+        if self.is_viewer:
+            print("Headless logger detected: running as read-only viewer")
+        
+        self.service = LoggerService(settings, read_only=self.is_viewer)
+        # Live readings first; the existing log streams into the chart from a thread
+        self._history_redraw_pending = False
+        self.service.start(background_load=True, on_progress=self._on_history_progress)
+        profiler.mark('logger service')
+        self.sensor_ids = self.service.sensor_ids
+        # Shared stores (history, rollups, stats, archive) live in the service
+        self.history = self.service.history
+        self.rollups = self.service.rollups
+        self.stats = self.service.stats
+        self.archive = self.service.archive
+        signal.signal(signal.SIGTERM, self.on_sigterm)
+        # Geometry is saved as it changes (debounced), not only on a clean exit
+        Window.bind(on_resize=self._save_window_geometry)
         
-        # Initialize Range Trackers
-        self.prod_min = None
-        self.prod_max = None
-        self.amb_min = None
-        self.amb_max = None
+        # Names, colors and visibility per probe (settings['sensor_map'])
+        self.registry = SensorRegistry(settings)
+        self.sensor_cards = {}   # sensor_id -> SensorCard
+        self.sensor_rows = {}    # sensor_id -> SensorSettingsRow
+        self.plots = {}          # sensor_id -> RingLinePlot
+        self.refresh_sensors(force=True)
         
         self.setup_graph()
         
@@ -352,44 +455,109 @@ class TempMonitorApp(App):
         # Immediate display update
         Clock.schedule_once(self.update_display_only, 1) 
         Clock.schedule_interval(self.update_display_only, 2) 
+        self._frame_event = None
+        self.set_profiling(profiler.enabled)
         
+        profiler.mark('build')
+        Clock.schedule_once(self._on_first_frame, 0)
         return self.root
 
+    def _on_first_frame(self, dt):
+        profiler.mark('first frame')
+        print(profiler.format_startup())
+
+    def _on_history_progress(self, done):
+        """Called from the history load thread; redraws at most twice a second."""
+        if done:
+            Clock.schedule_once(lambda dt: self._show_loaded_history(True))
+        elif not self._history_redraw_pending:
+            self._history_redraw_pending = True
+            Clock.schedule_once(lambda dt: self._show_loaded_history(False), 0.5)
+
+    def _show_loaded_history(self, done):
+        self._history_redraw_pending = False
+        self.refresh_sensors()
+        if done:
+            self.load_history_to_graph()
+            print(profiler.format_startup())
+        elif self.chart_follow_live:
+            self.load_history_to_graph(reload=False)
+        else:
+            self._trigger_redraw()
+
     def on_stop(self):
         """Save settings on exit."""
+        self.service.stop()
+        self.logger_lock.release()
+        self._save_window_geometry()
+        # Write now instead of waiting for the debounced save
+        settings.save()
+
+    def _save_window_geometry(self, *args):
         settings.set('window_width', Window.width)
         settings.set('window_height', Window.height)
         settings.set('window_top', Window.top)
         settings.set('window_left', Window.left)
-        settings.set('log_interval', self.log_interval)
-        settings.set('units', self.units)
-        settings.set('frequency_unit', self.frequency_unit)
-        settings.save()
+
+    def on_sigterm(self, signum, frame):
+        """Flush queued samples before the service manager kills us."""
+        print("SIGTERM received, flushing log...")
+        self.service.flush()
+        Clock.schedule_once(lambda dt: self.stop())
 
     # --- SETTINGS HANDLERS ---
     def set_units(self, unit):
         self.units = unit
+        settings.set('units', unit)
         self.update_display_only()
-        # Reload history to recalculate graph points and Min/Max ranges in new unit
-        self.load_history_to_graph()
+        # Unit switch is pure formatting: labels from stats, plots from memory
+        self.load_history_to_graph(reload=False)
 
     def set_frequency_unit(self, unit):
         self.frequency_unit = unit
+        settings.set('frequency_unit', unit)
         self.reschedule_log_event()
         self.setup_graph()
 
     def update_log_interval(self, value):
         self.log_interval = int(value)
+        # Slider drags coalesce into one write (SettingsManager debounces)
+        settings.set('log_interval', self.log_interval)
         self.reschedule_log_event()
 
+    def set_profiling(self, enabled):
+        """Diagnostics toggle: stage timers plus a per-frame Clock hook."""
+        profiler.enabled = bool(enabled)
+        settings.set('profiling', profiler.enabled)
+        if profiler.enabled and self._frame_event is None:
+            self._frame_event = Clock.schedule_interval(self._record_frame, 0)
+        elif not profiler.enabled and self._frame_event is not None:
+            self._frame_event.cancel()
+            self._frame_event = None
+
+    def _record_frame(self, dt):
+        profiler.record('frame', dt)
+
     def reschedule_log_event(self):
-        if hasattr(self, 'scheduled_event'):
-            self.scheduled_event.cancel()
-        
+        """Starts the sampling clock, or changes its period without restarting
+        the phase (slider drags keep ticking on the same boundaries)."""
         interval_seconds = self.log_interval * self.time_factor
-        self.scheduled_event = Clock.schedule_interval(self.log_data, interval_seconds)
+        if self.service.scheduler is None:
+            # Let the first poll land before the first sample
+            self.service.start_sampling(on_tick=self._on_sample_tick,
+                                        first_after=min(interval_seconds, 2.5))
+        elif self.service.scheduler.interval == interval_seconds:
+            return
+        self.service.set_sample_interval(interval_seconds)
         print(f"Logging every {self.log_interval} {self.frequency_unit} ({interval_seconds}s real time)")
 
+    def _on_sample_tick(self, target):
+        # Scheduler thread: acquire the sample here, on the tick; the work
+        # (log, plots) runs on the Kivy thread with the acquisition's timestamp
+        acquired, snapshot = self.service.acquire(target)
+        Clock.schedule_once(lambda dt: self.log_data(dt, epoch=acquired, snapshot=snapshot))
+        return acquired
+
     def on_reset_click(self):
         """Handles the safety 'Arm & Fire' logic for the reset button."""
         if self.reset_btn_text == "RESET CSV DATA":
@@ -408,31 +576,29 @@ class TempMonitorApp(App):
         self.reset_btn_color = [0.8, 0.2, 0.2, 1]
 
     def clear_csv_data(self):
-        """Wipes the CSV file and resets the graph."""
+        """Archives the current log segment, starts a new one and resets the graph."""
         try:
-            with open(settings.csv_file, 'w', newline='') as f:
-                csv.writer(f).writerow(['timestamp', 'sensor_id', 'temperature'])
+            # Archive the current segment instead of throwing it away
+            if not self.service.reset():
+                if self.is_viewer:
+                    print("Viewer mode: reset the log from the logging service instead.")
+                else:
+                    print("History is still loading, try the reset again shortly.")
+                return
             
-            self.plot_product.points = []
-            self.plot_ambient.points = []
+            for plot in self.plots.values():
+                plot.clear()
             
-            # Reset Range Trackers
-            self.prod_min = None
-            self.prod_max = None
-            self.amb_min = None
-            self.amb_max = None
-            self.product_range = "Range: --.- - --.-"
-            self.ambient_range = "Range: --.- - --.-"
+            # Reset Range Labels
+            for card in self.sensor_cards.values():
+                card.range_text = "Range: --.- - --.-"
             
             if self.root:
                 chart_screen = self.root.get_screen('chart')
                 graph = chart_screen.ids.main_graph
                 
                 # Reset bounds using actual current time
-                now_ts = datetime.now().timestamp()
-                graph.xmin = now_ts
-                graph.xmax = now_ts + 60
-                graph.x_ticks_major = max(1, (graph.xmax - graph.xmin) / 6) 
+                self.apply_chart_window()
                 
                 graph.ymin = 0
                 graph.ymax = 40
@@ -444,36 +610,116 @@ class TempMonitorApp(App):
 
     # --- HELPERS ---
     def format_unix_to_time(self, x_value):
-        """Converts Unix epoch float to HH:MM:SS for the graph X-axis labels."""
+        """Converts Unix epoch float to HH:MM:SS (or day + HH:MM for multi-day
+        windows) for the graph X-axis labels."""
         try:
+            graph = self.root.get_screen('chart').ids.main_graph if self.root else None
+            if graph is not None and graph.xmax - graph.xmin > 24 * 3600:
+                return datetime.fromtimestamp(x_value).strftime('%a %H:%M')
             return datetime.fromtimestamp(x_value).strftime('%H:%M:%S')
         except Exception:
             return ""
     
-    def get_temp_display(self, temp_c):
-        """Converts C float to C or F string"""
+    def to_display_units(self, temp_c):
+        """Converts a stored C value to the selected display unit"""
         if self.units == 'F':
-            val = (temp_c * 9/5) + 32
-        else:
-            val = temp_c
-        return f"{val:.1f}"
+            return (temp_c * 9/5) + 32
+        return temp_c
 
-    def get_spinner_ids(self):
-        """Retrieves sensor IDs from the new General Settings tab"""
-        if not self.root: return None, None
+    def get_temp_display(self, temp_c):
+        """Converts C float to C or F string"""
+        return f"{self.to_display_units(temp_c):.1f}"
+
+    def format_range(self, sensor_id, window=None):
+        """Formats a sensor's C min/max (all-time or sliding window) as a display-unit range label"""
+        stats = self.stats.get(sensor_id, window)
+        lo, hi = (stats.min, stats.max) if stats is not None else (None, None)
+        # All-time also covers archived segments (from the manifest, no decompression)
+        archived = self.archive.sensor_range(sensor_id) if window is None and sensor_id else None
+        if archived:
+            lo = archived[0] if lo is None else min(lo, archived[0])
+            hi = archived[1] if hi is None else max(hi, archived[1])
+        if lo is None:
+            return "Range: --.- - --.-"
+        return f"Range: {self.to_display_units(lo):.1f} - {self.to_display_units(hi):.1f}"
+
+    def update_range_labels(self):
+        """Pure formatting from the streaming stats; no history scan, no I/O"""
+        for sensor_id, card in self.sensor_cards.items():
+            card.range_text = self.format_range(sensor_id)
+
+    def sync_history(self):
+        self.service.sync()
+
+    # --- SENSOR REGISTRY ---
+    def refresh_sensors(self, force=False):
+        """Registers probes from the bus / log and rebuilds cards, settings rows
+        and plots when the set of probes changed."""
+        self.sensor_ids = self.service.sensor_ids
+        ids = list(dict.fromkeys(self.sensor_ids + self.history.sensor_ids()))
+        if not self.registry.sync(ids) and not force: return False
+        self.rebuild_sensor_widgets()
+        if hasattr(self, '_trigger_redraw'):
+            self.rebuild_plots()
+        return True
+
+    def rebuild_sensor_widgets(self, settings_rows=True):
+        if not self.root: return
+        # Monitor cards: one row up to 2 probes, then a 2- or 4-column grid
+        grid = self.root.get_screen('monitor').ids.sensor_cards
+        grid.clear_widgets()
+        self.sensor_cards = {}
+        visible = self.registry.visible_ids()
+        grid.cols = max(1, len(visible) if len(visible) <= 2 else (2 if len(visible) <= 4 else 4))
+        for sensor_id in visible:
+            card = SensorCard(sensor_id=sensor_id, sensor_name=self.registry.name(sensor_id),
+                              color=self.registry.color(sensor_id),
+                              range_text=self.format_range(sensor_id))
+            self.sensor_cards[sensor_id] = card
+            grid.add_widget(card)
         
-        try:
-            sys_settings = self.root.get_screen('sys_settings')
-            gen_screen = sys_settings.ids.content_manager.get_screen('settings_general')
-            prod_id = gen_screen.ids.spinner_product.text
-            amb_id = gen_screen.ids.spinner_ambient.text
-            return prod_id, amb_id
-        except Exception as e:
-            # Fallback for when the UI is still booting up and hasn't loaded the screen tree
-            default_prod = self.sensor_ids[0] if self.sensor_ids else "No Sensor"
-            default_amb = self.sensor_ids[1] if len(self.sensor_ids) > 1 else default_prod
-            return default_prod, default_amb
-
+        # Settings rows (every active probe, hidden ones included)
+        if not settings_rows: return
+        sys_settings = self.root.get_screen('sys_settings')
+        rows = sys_settings.ids.content_manager.get_screen('settings_sensors').ids.sensor_rows
+        rows.clear_widgets()
+        self.sensor_rows = {}
+        for sensor_id in self.registry.active_ids():
+            info = self.registry.get(sensor_id)
+            row = SensorSettingsRow(sensor_id=sensor_id, sensor_name=info.name,
+                                    color=info.color, show=info.show)
+            self.sensor_rows[sensor_id] = row
+            rows.add_widget(row)
+        self.update_health_labels()
+
+    def update_health_labels(self):
+        """Read counters per probe on the SENSORS settings tab."""
+        if not self.sensor_rows: return
+        health = self.service.get_health()
+        for sensor_id, row in self.sensor_rows.items():
+            row.health_text = format_health(health.get(sensor_id))
+
+    def rename_sensor(self, sensor_id, name):
+        self.registry.rename(sensor_id, name)
+        card = self.sensor_cards.get(sensor_id)
+        if card: card.sensor_name = self.registry.name(sensor_id)
+
+    def cycle_sensor_color(self, sensor_id, row=None):
+        self.registry.cycle_color(sensor_id)
+        color = self.registry.color(sensor_id)
+        if row is not None: row.color = color
+        card = self.sensor_cards.get(sensor_id)
+        if card: card.color = color
+        plot = self.plots.get(sensor_id)
+        if plot: plot.color = color
+
+    def set_sensor_visible(self, sensor_id, show):
+        self.registry.set_visible(sensor_id, show)
+        self.rebuild_sensor_widgets(settings_rows=False)
+        self.rebuild_plots()
+        self.refresh_graph_mapping()
+
+    @profiler.timed('setup_graph')
     def setup_graph(self):
         chart_screen = self.root.get_screen('chart')
         graph = chart_screen.ids.main_graph 
@@ -499,159 +745,181 @@ class TempMonitorApp(App):
         graph.xmax = now_ts + 60  # 1 minute default buffer
         graph.x_ticks_major = max(1, (graph.xmax - graph.xmin) / 6)
         
-        # Reset plots
-        for plot in graph.plots:
-            graph.remove_plot(plot)
-            
-        self.plot_product = MeshLinePlot(color=[1, 1, 0, 1])  # Yellow
-        self.plot_ambient = MeshLinePlot(color=[0, 1, 0, 1])  # Green
+        # Reset plots: one per visible probe, in its registry color
+        self.rebuild_plots()
         
-        graph.add_plot(self.plot_product)
-        graph.add_plot(self.plot_ambient)
+        # Re-decimate on resize, window selection and pan/zoom; the live slide
+        # of xmin/xmax is only a plot transform (see append_live_samples)
+        if not hasattr(self, '_trigger_redraw'):
+            self._trigger_redraw = Clock.create_trigger(self.redraw_plots, 0)
+            graph.bind(width=self._trigger_redraw)
+            graph.bind(on_view_change=self.on_chart_view_change)
         self.load_history_to_graph()
 
-    def load_history_to_graph(self):
+    def rebuild_plots(self):
+        graph = self.root.get_screen('chart').ids.main_graph
+        for plot in list(graph.plots):
+            graph.remove_plot(plot)
+        self.plots = {}
+        for sensor_id in self.registry.visible_ids():
+            plot = RingLinePlot(color=self.registry.color(sensor_id))
+            self.plots[sensor_id] = plot
+            graph.add_plot(plot)
+
+    def set_chart_window(self, window):
+        """Selects a chart window from CHART_WINDOWS and resumes live follow."""
+        self.chart_window = window
+        self.apply_chart_window()
+        self._trigger_redraw()
+
+    def apply_chart_window(self):
+        """Sets the graph x-range for the selected window, anchored at 'now'."""
         if not self.root: return
-        prod_id, amb_id = self.get_spinner_ids()
-        pts_prod, pts_amb = [], []
+        graph = self.root.get_screen('chart').ids.main_graph
+        span = CHART_WINDOWS.get(self.chart_window)
+        buffer = self.log_interval * self.time_factor
+        now_ts = datetime.now().timestamp()
         
-        # Reset local trackers before recalculating from CSV
-        self.prod_min = None
-        self.prod_max = None
-        self.amb_min = None
-        self.amb_max = None
+        if span is None:
+            # Entire history: archived segments, plus samples evicted from memory to the log
+            firsts = [e for e in (self.history.live_start(s_id) for s_id in self.plots) if e is not None]
+            archived = self.archive.earliest()
+            if archived is not None: firsts.append(archived)
+            xmin = min(firsts) if firsts else now_ts
+            xmax = max(xmin + 60, now_ts + buffer)
+        else:
+            xmax = now_ts + buffer
+            xmin = xmax - span
+        graph.set_x_window(xmin, xmax)
+        self.chart_follow_live = True
+
+    def on_chart_view_change(self, graph):
+        """User panned/zoomed: stop sliding the window with new samples."""
+        self.chart_follow_live = False
+        self._trigger_redraw()
+
+    @profiler.timed('redraw_plots')
+    def redraw_plots(self, *args):
+        """Pushes a min/max-decimated view of the store into the plots
+        (about 2 points per horizontal pixel); the store keeps full resolution.
+        Live samples are then appended into the same pixel buckets by
+        append_live_samples() until the next redraw."""
+        if not self.root: return
+        graph = self.root.get_screen('chart').ids.main_graph
+        buckets = max(50, int(graph.width))
         
-        try:
-            if os.path.exists(settings.csv_file):
-                with open(settings.csv_file, 'r') as f:
-                    reader = csv.reader(f)
-                    next(reader, None)
-                    
-                    for row in reader:
-                        if len(row) < 3: continue
-                        ts_str, s_id, temp_c_str = row
-                        try:
-                            temp_val = float(temp_c_str)
-                            dt = datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S")
-                        except ValueError: continue
-
-                        # USE ABSOLUTE EPOCH TIMESTAMP FOR X-AXIS
-                        x_val = dt.timestamp()
-                        
-                        if self.units == 'F':
-                            temp_val = (temp_val * 9/5) + 32
-
-                        if s_id == prod_id: 
-                            pts_prod.append((x_val, temp_val))
-                            # Update Product Min/Max
-                            if self.prod_min is None or temp_val < self.prod_min: self.prod_min = temp_val
-                            if self.prod_max is None or temp_val > self.prod_max: self.prod_max = temp_val
-                            
-                        elif s_id == amb_id: 
-                            pts_amb.append((x_val, temp_val))
-                            # Update Ambient Min/Max
-                            if self.amb_min is None or temp_val < self.amb_min: self.amb_min = temp_val
-                            if self.amb_max is None or temp_val > self.amb_max: self.amb_max = temp_val
-                            
-            self.plot_product.points = pts_prod
-            self.plot_ambient.points = pts_amb
-            
-            # Update Display Strings
-            if self.prod_min is not None:
-                self.product_range = f"Range: {self.prod_min:.1f} - {self.prod_max:.1f}"
-            else:
-                self.product_range = "Range: --.- - --.-"
-                
-            if self.amb_min is not None:
-                self.ambient_range = f"Range: {self.amb_min:.1f} - {self.amb_max:.1f}"
+        # Long ranges are drawn from the coarsest rollup tier with enough points
+        tier = self.rollups.pick_tier(graph.xmin, graph.xmax, buckets)
+        for sensor_id, plot in self.plots.items():
+            rollup = self.rollups.get(tier, sensor_id) if tier else None
+            if rollup is not None:
+                xs, ys = rollup.envelope(graph.xmin, graph.xmax, tier)
             else:
-                self.ambient_range = "Range: --.- - --.-"
+                # Memory, plus pages read back from the log for an evicted part
+                xs, ys = self.history.read_window(sensor_id, graph.xmin, graph.xmax)
+                # Window reaches back before the live log: splice in overlapping archive segments
+                live_start = self.history.live_start(sensor_id)
+                if live_start is None: live_start = graph.xmax
+                if graph.xmin < live_start and self.archive.overlapping(graph.xmin, live_start):
+                    axs, ays = self.archive.read_range(sensor_id, graph.xmin, live_start)
+                    if len(axs):
+                        xs, ys = axs + xs, ays + ys
+            plot.set_points(minmax_decimate(xs, ys, graph.xmin, graph.xmax,
+                                            buckets, self.to_display_units),
+                            bucket_width=(graph.xmax - graph.xmin) / buckets,
+                            bucket_origin=graph.xmin)
+
+    @profiler.timed('load_history_to_graph')
+    def load_history_to_graph(self, reload=True):
+        """Rebuilds plots and ranges from the in-memory history.
+        reload=False (unit switch / remap) answers purely from memory."""
+        if not self.root: return
+        
+        try:
+            if reload:
+                self.sync_history()
+                self.refresh_sensors()
+
+            # Stats are stored in °C; conversion happens only here, at display time
+            self.update_range_labels()
             
-            if pts_prod or pts_amb:
-                all_pts = pts_prod + pts_amb
-                
+            active = [st for st in (self.stats.get(s_id) for s_id in self.plots) if st is not None]
+            if active:
                 chart_screen = self.root.get_screen('chart')
                 graph = chart_screen.ids.main_graph
                 
-                # --- DYNAMIC SCALING (X & Y) ---
-                min_x = min(p[0] for p in all_pts)
-                max_x = max(p[0] for p in all_pts)
-                min_y = min(p[1] for p in all_pts)
-                max_y = max(p[1] for p in all_pts)
+                # --- DYNAMIC SCALING (Y) --- streaming all-time min/max give y
+                min_y = self.to_display_units(min(st.min for st in active))
+                max_y = self.to_display_units(max(st.max for st in active))
                 
-                graph.xmin = min_x
-                # Ensure xmax is slightly ahead of the last point
-                graph.xmax = max(min_x + 60, max_x + (self.log_interval * self.time_factor))
                 graph.ymax = max_y + 5
                 graph.ymin = max(0, min_y - 5)
-                
-                # Dynamic Ticks: Always keep roughly 6 labels
-                graph.x_ticks_major = max(1, (graph.xmax - graph.xmin) / 6)
                 graph.y_ticks_major = (graph.ymax - graph.ymin) / 6
+            
+            # --- X-AXIS --- selected window
+            self.apply_chart_window()
+            
+            # USE ABSOLUTE EPOCH TIMESTAMP FOR X-AXIS (decimated to the graph width)
+            self.redraw_plots()
                 
         except Exception as e:
             print(f"Error loading history: {e}")
 
+    @profiler.timed('update_display_only')
     def update_display_only(self, dt=0):
         if not self.root: return
-        prod_id, amb_id = self.get_spinner_ids()
-        for sensor in self.sensors:
-            try:
-                temp_c = sensor.get_temperature()
-                if sensor.id == prod_id: 
-                    self.product_temp = self.get_temp_display(temp_c)
-                elif sensor.id == amb_id: 
-                    self.ambient_temp = self.get_temp_display(temp_c)
-            except: pass
-
-    def log_data(self, dt=0):
+        snapshot = self.service.get_snapshot()
+        for sensor_id, (temp_c, _) in snapshot.items():
+            card = self.sensor_cards.get(sensor_id)
+            if card: 
+                card.temp_text = self.get_temp_display(temp_c)
+        if self.root.current == 'sys_settings':
+            self.update_health_labels()
+        self.alert_text = "\n".join(self.format_alert(e) for e in self.service.get_alerts())
+
+    def format_alert(self, event):
+        """One banner line for an active alert, in display units."""
+        value, kind = event['value'], event['type']
+        delta = 9/5 if self.units == 'F' else 1.0
+        if kind in ('high', 'low'):
+            reading = f"{self.get_temp_display(value)}°{self.units}"
+        elif kind == 'disagree':
+            reading = f"{value * delta:.1f}°{self.units} apart"
+        elif kind == 'rate':
+            reading = f"{value * delta:+.2f}°{self.units}/min"
+        else:
+            reading = f"no reading for {value:.0f}s"
+        return f"{event['name']}: {reading}"
+
+    @profiler.timed('log_data')
+    def log_data(self, dt=0, epoch=None, snapshot=None):
         if not self.root: return
-        now_dt = datetime.now()
-        timestamp = now_dt.strftime("%Y-%m-%d %H:%M:%S")
-        prod_id, amb_id = self.get_spinner_ids()
-        data_rows = []
         
-        # Use real-world absolute epoch time for the X-axis
-        current_x = now_dt.timestamp()
-
-        for sensor in self.sensors:
-            try:
-                temp_c = sensor.get_temperature()
-                data_rows.append([timestamp, sensor.id, temp_c])
-                
-                plot_val = temp_c
-                if self.units == 'F':
-                    plot_val = (temp_c * 9/5) + 32
-
-                if sensor.id == prod_id:
-                    self.plot_product.points.append((current_x, plot_val))
-                    # Live Update Product Min/Max
-                    if self.prod_min is None or plot_val < self.prod_min: self.prod_min = plot_val
-                    if self.prod_max is None or plot_val > self.prod_max: self.prod_max = plot_val
-                    self.product_range = f"Range: {self.prod_min:.1f} - {self.prod_max:.1f}"
-                    
-                elif sensor.id == amb_id:
-                    self.plot_ambient.points.append((current_x, plot_val))
-                    # Live Update Ambient Min/Max
-                    if self.amb_min is None or plot_val < self.amb_min: self.amb_min = plot_val
-                    if self.amb_max is None or plot_val > self.amb_max: self.amb_max = plot_val
-                    self.ambient_range = f"Range: {self.amb_min:.1f} - {self.amb_max:.1f}"
-                    
-            except: pass
+        # Use real-world absolute epoch time for the X-axis (the sample's acquisition)
+        current_x = epoch if epoch is not None else datetime.now().timestamp()
+        # Logs the tick's snapshot (viewer mode: tails the logger's file instead)
+        self.service.log_tick(current_x, snapshot)
+        # New probes (e.g. seen in the logger's file) get a card and a plot
+        self.refresh_sensors()
         
-        with open(settings.csv_file, 'a', newline='') as f:
-            csv.writer(f).writerows(data_rows)
+        # Range labels from the streaming stats (°C -> display units)
+        self.update_range_labels()
+        plotted = [self.history.get_series(s_id) for s_id in self.plots]
             
         # --- DYNAMIC UPDATE ---
         chart_screen = self.root.get_screen('chart')
         graph = chart_screen.ids.main_graph
         
-        # 1. Update X-Axis
-        if current_x > graph.xmax:
-            graph.xmax = current_x + (self.log_interval * self.time_factor * 2) # Buffer ahead
+        # 1. Update X-Axis (only while following live data, not after a pan/zoom)
+        if self.chart_follow_live and current_x > graph.xmax:
+            new_xmax = current_x + (self.log_interval * self.time_factor * 2) # Buffer ahead
+            span = CHART_WINDOWS.get(self.chart_window)
+            # Fixed windows slide; 'all' keeps its start and grows
+            graph.xmin = new_xmax - span if span else graph.xmin
+            graph.xmax = new_xmax
             
         # If this is the very first point after a clear, snap xmin to it
-        if len(self.plot_product.points) + len(self.plot_ambient.points) <= 2:
+        if self.chart_follow_live and self.chart_window == 'all' and all(len(s) <= 1 for s in plotted):
             graph.xmin = current_x - (self.log_interval * self.time_factor)
 
         graph.x_ticks_major = max(1, (graph.xmax - graph.xmin) / 6)
@@ -662,8 +930,9 @@ class TempMonitorApp(App):
         needs_y_update = False
         
         recent_values = []
-        if self.plot_product.points: recent_values.append(self.plot_product.points[-1][1])
-        if self.plot_ambient.points: recent_values.append(self.plot_ambient.points[-1][1])
+        for series in plotted:
+            last = series.last()
+            if last: recent_values.append(self.to_display_units(last[1]))
         
         for val in recent_values:
             if val > (current_max_y - 1): # Buffer of 1
@@ -675,9 +944,44 @@ class TempMonitorApp(App):
                 
         if needs_y_update:
             graph.y_ticks_major = (graph.ymax - graph.ymin) / 6
+        
+        # 3. Append the new samples; the x-slide above only moved the plot transform
+        self.append_live_samples()
+
+    def append_live_samples(self):
+        """Feeds samples newer than each plot's last point into its ring
+        buffer, touching only the newest vertices. Falls back to a full
+        redraw when a plot asks for one (visible data would drop out of the
+        ring) or when a large batch arrived at once."""
+        graph = self.root.get_screen('chart').ids.main_graph
+        for sensor_id, plot in self.plots.items():
+            # Copy the new slice under the store lock: eviction on the loader
+            # thread may drop the front of these columns at any time
+            with self.history.lock:
+                series = self.history.get_series(sensor_id)
+                if plot.last_x is None:
+                    start = bisect_left(series.ts, graph.xmin)
+                else:
+                    start = bisect_right(series.ts, plot.last_x)
+                count = len(series) - start
+                if count <= 0: continue
+                if count > MAX_LIVE_APPEND:
+                    ts = temps = None
+                else:
+                    ts, temps = series.ts[start:], series.temps[start:]
+                first = series.ts[start]
+            # Panned away from now: new samples are off screen until the view comes back
+            if not self.chart_follow_live and first > graph.xmax: continue
+            if ts is None:
+                self._trigger_redraw()
+                return
+            for x, temp_c in zip(ts, temps):
+                if not plot.append(x, self.to_display_units(temp_c)):
+                    self._trigger_redraw()
+                    return
             
     def refresh_graph_mapping(self):
-        self.load_history_to_graph()
+        self.load_history_to_graph(reload=False)
 
 if __name__ == '__main__':
     TempMonitorApp().run()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Opt-in hot-path timing. Enable with TEMPMONITOR_PROFILE=1 or the
+'profiling' setting (Diagnostics tab). When disabled, a timed call costs
+one attribute check.
+
+    @profiler.timed('log_data')
+    def log_data(self, dt=0): ...
+
+    with profiler.span('redraw'):
+        ...
+
+Startup milestones (profiler.mark) are always recorded; they cost one
+list append each.
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+from functools import wraps
+
+WINDOW_SAMPLES = 500  # Rolling window per stage for p50/p95
+_T0 = time.perf_counter()  # First import of this module ~ process start
+
+
+class StageStats:
+    __slots__ = ('samples', 'count', 'total', 'max')
+
+    def __init__(self, window=WINDOW_SAMPLES):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max: self.max = seconds
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+        return {'count': self.count, 'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+                'p50_ms': pick(0.50) * 1000, 'p95_ms': pick(0.95) * 1000,
+                'max_ms': self.max * 1000}
+
+
+class Profiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started = time.time()
+        self._stages = {}
+        self._lock = threading.Lock()
+        self.startup = []  # (label, seconds since _T0)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.add(seconds)
+
+    def mark(self, label):
+        """Records a startup milestone."""
+        self.startup.append((label, time.perf_counter() - _T0))
+
+    def startup_breakdown(self):
+        """[{label, at_s, delta_s}] with delta_s the time since the previous milestone."""
+        rows, prev = [], 0.0
+        for label, at in self.startup:
+            rows.append({'label': label, 'at_s': at, 'delta_s': at - prev})
+            prev = at
+        return rows
+
+    def format_startup(self):
+        return "Startup: " + " | ".join(f"{r['label']} {r['delta_s']:.2f}s"
+                                        for r in self.startup_breakdown())
+
+    def timed(self, stage):
+        """Decorator timing every call of a function under `stage`."""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(stage, time.perf_counter() - t0)
+            return wrapper
+        return decorator
+
+    def span(self, stage):
+        return _Span(self, stage)
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+        self.started = time.time()
+
+    def summary(self):
+        """{stage: {count, mean_ms, p50_ms, p95_ms, max_ms}}"""
+        with self._lock:
+            return {name: stats.summary() for name, stats in sorted(self._stages.items())}
+
+    def format_table(self):
+        rows = [f"{'stage':<24}{'n':>7}{'p50':>9}{'p95':>9}{'max':>9}  (ms)"]
+        for name, s in self.summary().items():
+            rows.append(f"{name:<24}{s['count']:>7}{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['max_ms']:>9.1f}")
+        if self.startup:
+            rows.append("")
+            rows.append(f"{'startup':<24}{'+s':>9}{'at s':>9}")
+            for r in self.startup_breakdown():
+                rows.append(f"{r['label']:<24}{r['delta_s']:>9.2f}{r['at_s']:>9.2f}")
+        return "\n".join(rows)
+
+    def dump(self, path, extra=None):
+        """Writes the summary (plus any extra sections) as JSON. Returns the path."""
+        payload = {'started': self.started, 'dumped': time.time(),
+                   'enabled': self.enabled, 'stages': self.summary(),
+                   'startup': self.startup_breakdown()}
+        if extra: payload.update(extra)
+        with open(path, 'w') as f:
+            json.dump(payload, f, indent=1)
+        return path
+
+
+class _Span:
+    __slots__ = ('profiler', 'stage', 't0')
+
+    def __init__(self, profiler, stage):
+        self.profiler = profiler
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter() if self.profiler.enabled else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.t0 is not None:
+            self.profiler.record(self.stage, time.perf_counter() - self.t0)
+        return False
+
+
+profiler = Profiler(enabled=os.environ.get('TEMPMONITOR_PROFILE', '') not in ('', '0'))
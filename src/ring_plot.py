@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Line plot for the live chart that does not rebuild its mesh per sample.
+
+MeshLinePlot converts every point to pixels and re-uploads the whole mesh
+whenever its points or the axis range change. RingLinePlot instead keeps
+vertices in data units (x relative to an origin, y in display units) in a
+fixed ring of small line_strip meshes:
+
+  - append() touches only the newest chunk (CHUNK_POINTS vertices), merging
+    samples that fall in the same pixel bucket into its min/max pair;
+  - an axis change (window slide, y rescale, resize) only updates one
+    Translate and one Scale instruction;
+  - when the ring is full the oldest chunk is recycled, as long as it has
+    scrolled out of view.
+
+append() returns False when the caller should reload the plot with
+set_points() instead (visible data would be evicted, or x has drifted so far
+from the origin that float32 vertices lose precision).
+"""
+from kivy.graphics import Color, Mesh, PushMatrix, PopMatrix, Translate, Scale
+from kivy_garden.graph import Plot
+
+CHUNK_POINTS = 128
+REBASE_SPAN = 1e6   # Seconds from the origin before vertices are rebased (~0.06 s float32 step)
+
+
+class RingLinePlot(Plot):
+    def __init__(self, capacity=8192, **kwargs):
+        self._chunk_count = max(3, -(-capacity // CHUNK_POINTS) + 1)
+        self.bucket_width = 0.0   # Data units per min/max bucket; 0 keeps every sample
+        self._bucket_origin = 0.0
+        super().__init__(**kwargs)
+
+    def create_drawings(self):
+        self._color = Color(*self.color)
+        self._translate = Translate(0, 0)
+        self._scale = Scale(1, 1, 1)
+        self._meshes = [Mesh(mode='line_strip') for _ in range(self._chunk_count)]
+        self.bind(color=lambda instr, value: setattr(self._color, 'rgba', value))
+        self._reset()
+        return [self._color, PushMatrix(), self._translate, self._scale] + self._meshes + [PopMatrix()]
+
+    # --- DATA ---
+    def _reset(self):
+        self._chunks = [[] for _ in range(self._chunk_count)]  # Flat x, y, u, v vertex lists
+        self._head = 0       # Chunk receiving appends
+        self._tail = 0       # Oldest chunk
+        self._origin = None  # Data x subtracted from every vertex
+        self._bucket = None  # [index, (x, y) min, (x, y) max, vertex count] of the newest bucket
+        self._dirty = set()
+        self.last_x = None
+
+    def clear(self):
+        self._reset()
+        for mesh in self._meshes:
+            mesh.vertices = []
+            mesh.indices = []
+        self.ask_draw()
+
+    def set_points(self, points, bucket_width=0.0, bucket_origin=0.0):
+        """Replaces the contents with already decimated (x, y) points. Later
+        appends merge into buckets of bucket_width starting at bucket_origin."""
+        self._reset()
+        capacity = (self._chunk_count - 1) * (CHUNK_POINTS - 1)
+        if len(points) > capacity:
+            points = points[-capacity:]
+        self.bucket_width = bucket_width
+        self._bucket_origin = bucket_origin
+        if points:
+            self._origin = points[0][0]
+            for x, y in points:
+                self._push(x, y)
+            self.last_x = points[-1][0]
+        self._upload(all_chunks=True)
+        self.ask_draw()
+
+    def append(self, x, y):
+        """Adds one sample at the right edge. Returns False if the plot needs set_points()."""
+        if self._origin is None:
+            self._origin = x
+        elif x - self._origin > REBASE_SPAN:
+            return False
+
+        ok = True
+        bucket = self._bucket
+        index = int((x - self._bucket_origin) // self.bucket_width) if self.bucket_width > 0 else None
+        if index is not None and bucket is not None and bucket[0] == index:
+            self._merge(bucket, x, y)
+        else:
+            # A bucket's vertices must stay in one chunk so merges only rewrite its tail
+            ok = self._push(x, y, reserve=2 if index is not None else 1)
+            if index is not None:
+                self._bucket = [index, (x, y), (x, y), 1]
+        self.last_x = x
+        self._upload()
+        return ok
+
+    def _merge(self, bucket, x, y):
+        if y < bucket[1][1]:
+            bucket[1] = (x, y)
+        elif y > bucket[2][1]:
+            bucket[2] = (x, y)
+        else:
+            return
+        chunk = self._chunks[self._head]
+        first, second = sorted((bucket[1], bucket[2]))
+        if bucket[3] == 1:
+            chunk.extend((0.0, 0.0, 0.0, 0.0))
+            bucket[3] = 2
+        chunk[-8:] = [first[0] - self._origin, first[1], 0.0, 0.0,
+                      second[0] - self._origin, second[1], 0.0, 0.0]
+        self._dirty.add(self._head)
+
+    def _push(self, x, y, reserve=1):
+        """Appends one vertex, moving to the next chunk when this one is full.
+        Returns False if that had to evict data that is still on screen."""
+        ok = True
+        chunk = self._chunks[self._head]
+        if len(chunk) + 4 * reserve > 4 * CHUNK_POINTS:
+            nxt = (self._head + 1) % self._chunk_count
+            if nxt == self._tail:
+                oldest = self._chunks[self._tail]
+                if oldest and oldest[-4] + self._origin >= self.params['xmin']:
+                    ok = False
+                self._tail = (self._tail + 1) % self._chunk_count
+            # Start the new strip at the last vertex so the line stays connected
+            self._chunks[nxt] = chunk[-4:] if chunk else []
+            self._head = nxt
+            chunk = self._chunks[nxt]
+        chunk.extend((x - self._origin, y, 0.0, 0.0))
+        self._dirty.add(self._head)
+        return ok
+
+    def _upload(self, all_chunks=False):
+        dirty = range(self._chunk_count) if all_chunks else self._dirty
+        for i in dirty:
+            vertices = self._chunks[i]
+            self._meshes[i].vertices = vertices
+            self._meshes[i].indices = list(range(len(vertices) // 4))
+        self._dirty = set()
+
+    # --- TRANSFORM ---
+    def draw(self, *args):
+        super().draw(*args)
+        params = self.params
+        x0, y0, x1, y1 = params['size']
+        xspan = params['xmax'] - params['xmin']
+        yspan = params['ymax'] - params['ymin']
+        if xspan <= 0 or yspan <= 0: return
+        sx = (x1 - x0) / float(xspan)
+        sy = (y1 - y0) / float(yspan)
+        origin = self._origin if self._origin is not None else params['xmin']
+        # Same mapping as Plot.x_px / y_px, applied to data-unit vertices on the GPU
+        self._translate.xy = (x0 + (origin - params['xmin']) * sx, y0 - params['ymin'] * sy)
+        self._scale.xyz = (sx, sy, 1.0)
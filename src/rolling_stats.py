@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+import math
+from array import array
+from bisect import bisect_right
+
+from binary_log import get_numpy
+
+# Sliding windows tracked per sensor, in seconds (last 1 h, last 24 h)
+DEFAULT_WINDOWS = (3600, 86400)
+# Backlogs at least this long in total, across sensors (e.g. a history load
+# chunk), take the bulk path
+BULK_MIN = 4096
+# Samples leaving a window at once that are removed with NumPy instead of one by one
+REMOVE_BULK_MIN = 64
+# Consumed samples at the front of a window's columns before they are reclaimed
+COMPACT_MIN = 1024
+
+
+# --- ALL-TIME ---
+class RunningStats:
+    """All-time count/min/max plus Welford mean and variance, O(1) per sample."""
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min: self.min = value
+        if self.max is None or value > self.max: self.max = value
+
+    def merge(self, count, mean, m2, lo, hi):
+        """Folds in the summary of another batch of samples (Chan et al.)."""
+        if not count: return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        if self.min is None or lo < self.min: self.min = lo
+        if self.max is None or hi > self.max: self.max = hi
+
+    @property
+    def stdev(self):
+        if self.count < 2: return 0.0
+        return math.sqrt(max(0.0, self.m2) / (self.count - 1))
+
+
+# --- SLIDING WINDOW ---
+class WindowStats(RunningStats):
+    """
+    Statistics over the last `window` seconds. Min/max come from monotonic
+    queues (amortised O(1)); mean/variance use Welford with removal.
+    Samples live in two float64 columns (16 B each, not a tuple per sample)
+    read from a moving head and compacted now and then; the queues hold
+    absolute sample numbers into them.
+    """
+    __slots__ = ('window', '_ts', '_vs', '_head', '_base',
+                 '_min_q', '_max_q', '_min_head', '_max_head')
+
+    def __init__(self, window):
+        super().__init__()
+        self.window = window
+        self._ts = array('d')     # Arrival order; live samples from _head on
+        self._vs = array('d')
+        self._head = 0
+        self._base = 0            # Sample number of _ts[0]
+        self._min_q = array('q')  # Sample numbers, increasing values (from _min_head)
+        self._max_q = array('q')  # Sample numbers, decreasing values (from _max_head)
+        self._min_head = 0
+        self._max_head = 0
+
+    def _value(self, n):
+        return self._vs[n - self._base]
+
+    def add(self, epoch, value):
+        n = self._base + len(self._ts)
+        self._ts.append(epoch)
+        self._vs.append(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        q = self._min_q
+        while len(q) > self._min_head and self._value(q[-1]) > value: q.pop()
+        q.append(n)
+        q = self._max_q
+        while len(q) > self._max_head and self._value(q[-1]) < value: q.pop()
+        q.append(n)
+        self.evict(epoch)
+
+    def add_bulk(self, ts, values):
+        """
+        add() for a time-ordered batch of NumPy arrays, all inside the window
+        at the batch's end. Mean/variance merge in one step; the min/max
+        queues keep the samples no later one undercuts/exceeds (suffix extremes).
+        """
+        np = get_numpy()
+        self.evict(float(ts[-1]))
+        first = self._base + len(self._ts)
+        low, peak = float(values.min()), float(values.max())
+        mean = float(values.mean())
+        self.merge(len(values), mean, float(np.square(values - mean).sum()), low, peak)
+        self._ts.frombytes(ts.astype(np.float64).tobytes())
+        self._vs.frombytes(values.astype(np.float64).tobytes())
+
+        q = self._min_q
+        while len(q) > self._min_head and self._value(q[-1]) > low: q.pop()
+        later = np.minimum.accumulate(values[::-1])[::-1]
+        q.extend((np.flatnonzero(np.append(values[:-1] <= later[1:], True)) + first).tolist())
+        q = self._max_q
+        while len(q) > self._max_head and self._value(q[-1]) < peak: q.pop()
+        later = np.maximum.accumulate(values[::-1])[::-1]
+        q.extend((np.flatnonzero(np.append(values[:-1] >= later[1:], True)) + first).tolist())
+        self.min = self._value(self._min_q[self._min_head])
+        self.max = self._value(self._max_q[self._max_head])
+
+    def evict(self, now):
+        """Drops samples older than the window, relative to `now`."""
+        cutoff = now - self.window
+        ts, head, end = self._ts, self._head, len(self._ts)
+        start = head
+        while head < end and ts[head] <= cutoff: head += 1
+        if head > start:
+            self._remove(self._vs[start:head])
+            self._head = head
+        # Queue entries for samples that just left the window
+        first = self._base + head
+        q, qh = self._min_q, self._min_head
+        while qh < len(q) and q[qh] < first: qh += 1
+        self._min_head = qh
+        self.min = self._value(q[qh]) if qh < len(q) else None
+        q, qh = self._max_q, self._max_head
+        while qh < len(q) and q[qh] < first: qh += 1
+        self._max_head = qh
+        self.max = self._value(q[qh]) if qh < len(q) else None
+        self._compact()
+
+    def _compact(self):
+        # Reclaim consumed fronts once they are most of a column
+        head = self._head
+        if head >= COMPACT_MIN and head * 2 >= len(self._ts):
+            del self._ts[:head]
+            del self._vs[:head]
+            self._base += head
+            self._head = 0
+        if self._min_head >= COMPACT_MIN and self._min_head * 2 >= len(self._min_q):
+            del self._min_q[:self._min_head]
+            self._min_head = 0
+        if self._max_head >= COMPACT_MIN and self._max_head * 2 >= len(self._max_q):
+            del self._max_q[:self._max_head]
+            self._max_head = 0
+
+    def _remove(self, values):
+        """Welford in reverse: takes samples (an array('d')) back out of count/mean/m2."""
+        np = get_numpy()
+        rest = self.count - len(values)
+        if rest <= 0:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+        elif np is not None and len(values) >= REMOVE_BULK_MIN:
+            # Whole batch at once: Chan's merge solved for the remaining part
+            batch = np.frombuffer(values, dtype=np.float64)
+            mean = float(batch.mean())
+            rest_mean = (self.count * self.mean - len(values) * mean) / rest
+            delta = mean - rest_mean
+            self.m2 -= float(np.square(batch - mean).sum()) + delta * delta * rest * len(values) / self.count
+            self.count, self.mean = rest, rest_mean
+        else:
+            for value in values:
+                self.count -= 1
+                delta = value - self.mean
+                self.mean -= delta / self.count
+                self.m2 -= delta * (value - self.mean)
+
+    def memory_bytes(self):
+        return (len(self._ts) + len(self._vs) + len(self._min_q) + len(self._max_q)) * 8
+
+
+# --- PER SENSOR ---
+class SensorStats:
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.all_time = RunningStats()
+        self.windows = {w: WindowStats(w) for w in windows}
+
+    def add(self, epoch, temp_c):
+        self.all_time.add(temp_c)
+        for ws in self.windows.values():
+            ws.add(epoch, temp_c)
+
+    def add_bulk(self, ts, temps, start):
+        """
+        Same result as add() for ts[start:], temps[start:] (time-ordered):
+        all-time from vectorized reductions when NumPy is there, and each
+        window only sees the samples that are still inside it at the end.
+        """
+        np = get_numpy()
+        if np is not None:
+            values = np.frombuffer(temps[start:], dtype=np.float64)
+            mean = float(values.mean())
+            self.all_time.merge(len(values), mean, float(np.square(values - mean).sum()),
+                                float(values.min()), float(values.max()))
+        else:
+            for i in range(start, len(temps)):
+                self.all_time.add(temps[i])
+        for ws in self.windows.values():
+            lo = bisect_right(ts, ts[-1] - ws.window, start)
+            if np is not None and lo < len(ts):
+                ws.add_bulk(np.frombuffer(ts[lo:], dtype=np.float64),
+                            np.frombuffer(temps[lo:], dtype=np.float64))
+                continue
+            for i in range(lo, len(ts)):
+                ws.add(ts[i], temps[i])
+
+    def get(self, window=None):
+        """Stats object for a sliding window (seconds) or all-time (None)."""
+        if window is None: return self.all_time
+        return self.windows[window]
+
+    def memory_bytes(self):
+        return sum(ws.memory_bytes() for ws in self.windows.values())
+
+
+class StatsTracker:
+    """
+    Streaming per-sensor statistics, always in °C (convert at display time).
+    Fed incrementally from HistoryStore, so each update costs O(new samples).
+    """
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.windows = tuple(windows)
+        self._sensors = {}     # sensor_id -> SensorStats
+        self._consumed = {}    # sensor_id -> samples fed from HistoryStore
+
+    def clear(self):
+        self._sensors = {}
+        self._consumed = {}
+
+    def add(self, sensor_id, epoch, temp_c):
+        stats = self._sensors.get(sensor_id)
+        if stats is None:
+            stats = self._sensors[sensor_id] = SensorStats(self.windows)
+        stats.add(epoch, temp_c)
+
+    def catch_up(self, history):
+        backlog = []
+        for sensor_id in history.sensor_ids():
+            series = history.get_series(sensor_id)
+            # Absolute count: samples evicted from memory were already consumed
+            consumed = self._consumed.get(sensor_id, 0)
+            if consumed > series.dropped + len(series):
+                # History was cleared underneath us; rebuild this sensor
+                self._sensors.pop(sensor_id, None)
+                consumed = 0
+            backlog.append((sensor_id, series, max(0, consumed - series.dropped)))
+        # Judged on the whole backlog: a chunk spread over many probes is still bulk
+        bulk = sum(len(series) - start for _, series, start in backlog) >= BULK_MIN
+        for sensor_id, series, start in backlog:
+            ts, temps = series.ts, series.temps
+            if bulk and len(series) > start:
+                stats = self._sensors.get(sensor_id)
+                if stats is None:
+                    stats = self._sensors[sensor_id] = SensorStats(self.windows)
+                stats.add_bulk(ts, temps, start)
+            else:
+                for i in range(start, len(series)):
+                    self.add(sensor_id, ts[i], temps[i])
+            self._consumed[sensor_id] = series.dropped + len(series)
+
+    def get(self, sensor_id, window=None):
+        """RunningStats/WindowStats for a sensor, or None if it has no data."""
+        stats = self._sensors.get(sensor_id)
+        if stats is None: return None
+        return stats.get(window)
+
+    def memory_bytes(self):
+        """Approximate size of the samples held for the sliding windows."""
+        return sum(stats.memory_bytes() for stats in self._sensors.values())
+
+    def evict(self, now):
+        """Ages every sliding window, e.g. when a sensor stops reporting."""
+        for stats in self._sensors.values():
+            for ws in stats.windows.values():
+                ws.evict(now)
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+import os
+import csv
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from binary_log import get_numpy
+
+# Bucket sizes in seconds: 1 min, 15 min, 1 h
+DEFAULT_TIERS = (60, 900, 3600)
+# How far back a tier is kept (memory and file); older ranges use a coarser tier
+TIER_RETENTION = {60: 31 * 86400}
+# Bytes per bucket in memory (five float64 columns)
+BUCKET_BYTES = 40
+# Backlogs at least this long in total, across sensors, are bucketed with NumPy
+# reductions (when available)
+BULK_MIN = 4096
+
+
+# --- ONE TIER, ONE SENSOR ---
+class RollupSeries:
+    """
+    Pre-aggregated buckets for one sensor in one tier, column-wise:
+    bucket start (epoch), min, max, sum and count (mean = sum / count).
+    The last bucket stays open until a sample lands in a later bucket.
+    """
+    __slots__ = ('starts', 'mins', 'maxs', 'sums', 'counts')
+
+    def __init__(self):
+        self.starts = array('d')
+        self.mins = array('d')
+        self.maxs = array('d')
+        self.sums = array('d')
+        self.counts = array('d')
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, bucket_start, temp_c):
+        """Adds a sample; returns the index of a bucket it closed, or None."""
+        if self.starts and bucket_start == self.starts[-1]:
+            i = len(self.starts) - 1
+            if temp_c < self.mins[i]: self.mins[i] = temp_c
+            if temp_c > self.maxs[i]: self.maxs[i] = temp_c
+            self.sums[i] += temp_c
+            self.counts[i] += 1
+            return None
+        if self.starts and bucket_start < self.starts[-1]:
+            return None  # Out-of-order sample (clock step); raw log still has it
+        closed = len(self.starts) - 1 if self.starts else None
+        self.append_bucket(bucket_start, temp_c, temp_c, temp_c, 1)
+        return closed
+
+    def drop_before(self, epoch):
+        """Drops buckets starting before `epoch`; returns how many."""
+        i = bisect_left(self.starts, epoch)
+        if i:
+            for column in (self.starts, self.mins, self.maxs, self.sums, self.counts):
+                del column[:i]
+        return i
+
+    def append_bucket(self, start, lo, hi, total, count):
+        self.starts.append(start)
+        self.mins.append(lo)
+        self.maxs.append(hi)
+        self.sums.append(total)
+        self.counts.append(count)
+
+    def mean(self, i):
+        return self.sums[i] / self.counts[i]
+
+    def row(self, i, sensor_id):
+        return [int(self.starts[i]), sensor_id, self.mins[i], self.mean(i),
+                self.maxs[i], int(self.counts[i])]
+
+    def envelope(self, xmin, xmax, bucket_seconds):
+        """
+        Min/max envelope of the buckets overlapping xmin..xmax as parallel
+        (xs, ys) columns: min at the bucket start, max at its midpoint.
+        """
+        lo = max(0, bisect_right(self.starts, xmin - bucket_seconds))
+        hi = bisect_right(self.starts, xmax)
+        half = bucket_seconds / 2
+        xs, ys = array('d'), array('d')
+        for i in range(lo, hi):
+            start = self.starts[i]
+            xs.append(start)
+            ys.append(self.mins[i])
+            xs.append(start + half)
+            ys.append(self.maxs[i])
+        return xs, ys
+
+
+# --- ALL TIERS, ALL SENSORS ---
+class RollupStore:
+    """
+    Multi-resolution rollups (1 min / 15 min / 1 h by default) kept next
+    to the raw log. Closed buckets are appended to one CSV per tier, so a
+    restart only re-aggregates samples newer than the last closed bucket.
+    read_only stores (a viewer attached to another logger) never write files.
+    Tiers in TIER_RETENTION only keep that much history. The files are
+    parsed by load(), on the history loader thread, or at the first catch_up().
+    """
+    def __init__(self, rollup_dir, tiers=DEFAULT_TIERS, read_only=False):
+        self.rollup_dir = rollup_dir
+        self.read_only = read_only
+        self.tiers = tuple(sorted(tiers))
+        self._data = {bs: {} for bs in self.tiers}   # bucket_seconds -> {sensor_id: RollupSeries}
+        self._consumed = {}                          # sensor_id -> samples fed from HistoryStore
+        self._pending = {bs: [] for bs in self.tiers}
+        self._sealed = {bs: {} for bs in self.tiers}   # last persisted bucket start per sensor
+        self._loaded = False
+        self._floors = {}   # bucket_seconds -> oldest bucket start kept (TIER_RETENTION)
+
+    def tier_file(self, bucket_seconds):
+        return os.path.join(self.rollup_dir, f"rollup_{bucket_seconds}s.csv")
+
+    def get(self, bucket_seconds, sensor_id):
+        return self._data[bucket_seconds].get(sensor_id)
+
+    def _cutoff(self, bucket_seconds):
+        retention = TIER_RETENTION.get(bucket_seconds)
+        return time.time() - retention if retention else float('-inf')
+
+    def load(self):
+        """Parses the tier files. Builds new dicts and swaps them in, so
+        readers on other threads never see a half-loaded tier."""
+        data = {bs: {} for bs in self.tiers}
+        sealed = {bs: {} for bs in self.tiers}
+        for bs in self.tiers:
+            path = self.tier_file(bs)
+            if not os.path.exists(path): continue
+            cutoff = self._cutoff(bs)
+            expired = 0
+            try:
+                with open(path, 'r', newline='') as f:
+                    for row in csv.reader(f):
+                        if len(row) < 6: continue
+                        try:
+                            start, lo, mean, hi, count = (float(row[0]), float(row[2]),
+                                                          float(row[3]), float(row[4]), float(row[5]))
+                        except ValueError: continue
+                        series = data[bs].setdefault(row[1], RollupSeries())
+                        if series.starts and start <= series.starts[-1]: continue
+                        sealed[bs][row[1]] = start
+                        if start < cutoff:
+                            expired += 1
+                            continue
+                        series.append_bucket(start, lo, hi, mean * count, count)
+            except Exception as e:
+                print(f"Error loading rollup tier {bs}s: {e}")
+                continue
+            kept = sum(len(rs) for rs in data[bs].values())
+            if expired > kept and not self.read_only:
+                self._rewrite(bs, data[bs])
+        self._data, self._sealed = data, sealed
+        self._loaded = True
+
+    def _rewrite(self, bucket_seconds, tier):
+        """Rewrites a tier file without its expired buckets."""
+        path = self.tier_file(bucket_seconds)
+        tmp = path + '.tmp'
+        try:
+            with open(tmp, 'w', newline='') as f:
+                writer = csv.writer(f)
+                for sensor_id, rs in tier.items():
+                    writer.writerows(rs.row(i, sensor_id) for i in range(len(rs)))
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Error compacting rollup tier {bucket_seconds}s: {e}")
+
+    def memory_bytes(self):
+        return sum(len(rs) for tier in self._data.values() for rs in tier.values()) * BUCKET_BYTES
+
+    def clear(self):
+        """Drops every tier (used when the raw log is reset)."""
+        self._data = {bs: {} for bs in self.tiers}
+        self._consumed = {}
+        self._pending = {bs: [] for bs in self.tiers}
+        self._sealed = {bs: {} for bs in self.tiers}
+        self._loaded = True
+        if self.read_only: return
+        for bs in self.tiers:
+            try:
+                os.remove(self.tier_file(bs))
+            except FileNotFoundError: pass
+
+    def _resume_index(self, sensor_id, series):
+        """First raw sample not yet covered by a persisted (closed) bucket."""
+        closed_end = None
+        for bs in self.tiers:
+            rs = self._data[bs].get(sensor_id)
+            end = rs.starts[-1] + bs if rs else float('-inf')
+            closed_end = end if closed_end is None else min(closed_end, end)
+        return bisect_left(series.ts, closed_end)
+
+    def catch_up(self, history):
+        """
+        Feeds samples the HistoryStore gained since the last call into every
+        tier (O(new samples)) and persists buckets that were closed.
+        """
+        if not self._loaded: self.load()
+        self._floors = {bs: self._cutoff(bs) for bs in TIER_RETENTION}
+        backlog = []
+        for sensor_id in history.sensor_ids():
+            series = history.get_series(sensor_id)
+            # Consumed counts are absolute: samples evicted from memory still count
+            consumed = self._consumed.get(sensor_id)
+            if consumed is None or consumed > series.dropped + len(series):
+                start = self._resume_index(sensor_id, series)
+            else:
+                start = max(0, consumed - series.dropped)
+            backlog.append((sensor_id, series, start))
+        # Judged on the whole backlog: a chunk spread over many probes is still bulk
+        bulk = (sum(len(series) - start for _, series, start in backlog) >= BULK_MIN
+                and get_numpy() is not None)
+        for sensor_id, series, start in backlog:
+            ts, temps = series.ts, series.temps
+            if bulk and len(series) > start:
+                self.add_bulk(sensor_id, ts[start:], temps[start:])
+            else:
+                for i in range(start, len(series)):
+                    self.add(sensor_id, ts[i], temps[i])
+            self._consumed[sensor_id] = series.dropped + len(series)
+        self.flush()
+        for bs, floor in self._floors.items():
+            for rs in self._data.get(bs, {}).values():
+                if rs.starts and rs.starts[0] < floor: rs.drop_before(floor)
+
+    def add(self, sensor_id, epoch, temp_c):
+        for bs in self.tiers:
+            tier = self._data[bs]
+            rs = tier.get(sensor_id)
+            if rs is None:
+                rs = tier[sensor_id] = RollupSeries()
+            # Skip buckets already persisted before a restart, or past retention
+            bucket = epoch - (epoch % bs)
+            if bucket <= self._sealed[bs].get(sensor_id, float('-inf')): continue
+            if bucket < self._floors.get(bs, float('-inf')): continue
+            closed = rs.add(bucket, temp_c)
+            if closed is not None and rs.starts[closed] > self._sealed[bs].get(sensor_id, float('-inf')):
+                self._pending[bs].append(rs.row(closed, sensor_id))
+
+    def add_bulk(self, sensor_id, ts, temps):
+        """
+        add() for a whole time-ordered backlog at once: bucket starts,
+        min/max/sum/count per bucket via NumPy reduceat, with the same
+        sealed-bucket and out-of-order rules as the per-sample path.
+        """
+        np = get_numpy()
+        ts = np.frombuffer(ts, dtype=np.float64)
+        temps = np.frombuffer(temps, dtype=np.float64)
+        for bs in self.tiers:
+            tier = self._data[bs]
+            rs = tier.get(sensor_id)
+            if rs is None:
+                rs = tier[sensor_id] = RollupSeries()
+            sealed = self._sealed[bs].get(sensor_id, float('-inf'))
+            buckets = ts - np.mod(ts, bs)
+            keep = (buckets > sealed) & (buckets >= self._floors.get(bs, float('-inf')))
+            buckets, values = buckets[keep], temps[keep]
+            # A sample behind the newest bucket so far is dropped, as in RollupSeries.add
+            floor = rs.starts[-1] if rs.starts else float('-inf')
+            keep = buckets == np.maximum.accumulate(np.maximum(buckets, floor))
+            buckets, values = buckets[keep], values[keep]
+            if not len(buckets): continue
+
+            firsts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+            starts = buckets[firsts]
+            mins = np.minimum.reduceat(values, firsts)
+            maxs = np.maximum.reduceat(values, firsts)
+            sums = np.add.reduceat(values, firsts)
+            counts = np.diff(np.append(firsts, len(values)))
+            skip = 0
+            if rs.starts and starts[0] == rs.starts[-1]:
+                # Continue the open bucket
+                i = len(rs) - 1
+                rs.mins[i] = min(rs.mins[i], float(mins[0]))
+                rs.maxs[i] = max(rs.maxs[i], float(maxs[0]))
+                rs.sums[i] += float(sums[0])
+                rs.counts[i] += int(counts[0])
+                skip = 1
+            if skip == len(starts): continue
+
+            # Every bucket before the new last one is now closed
+            first_closed = len(rs) - 1 if rs.starts else 0
+            rs.starts.extend(starts[skip:].tolist())
+            rs.mins.extend(mins[skip:].tolist())
+            rs.maxs.extend(maxs[skip:].tolist())
+            rs.sums.extend(sums[skip:].tolist())
+            rs.counts.extend(counts[skip:].astype(np.float64).tolist())
+            for i in range(first_closed, len(rs) - 1):
+                if rs.starts[i] > sealed:
+                    self._pending[bs].append(rs.row(i, sensor_id))
+
+    def flush(self):
+        if self.read_only:
+            for rows in self._pending.values(): rows.clear()
+            return
+        if not any(self._pending.values()): return
+        os.makedirs(self.rollup_dir, exist_ok=True)
+        for bs, rows in self._pending.items():
+            if not rows: continue
+            try:
+                with open(self.tier_file(bs), 'a', newline='') as f:
+                    csv.writer(f).writerows(rows)
+                rows.clear()
+            except Exception as e:
+                print(f"Error writing rollup tier {bs}s: {e}")
+
+    def pick_tier(self, xmin, xmax, min_points):
+        """
+        Coarsest tier that still yields at least `min_points` envelope
+        points over xmin..xmax, or None to use raw samples.
+        """
+        span = xmax - xmin
+        for bs in reversed(self.tiers):
+            # A window reaching back past a tier's retention needs a coarser one
+            if (span / bs) * 2 >= min_points and xmin >= self._cutoff(bs):
+                return bs
+        return None
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Sampling clock for the logger: ticks on wall-clock boundaries of the log
+interval (every 5 s -> :00, :05, :10 ...; every 5 min -> on the 5-minute
+marks), on its own thread and independent of GUI frame timing.
+
+Targets are absolute boundaries, not "previous tick + interval", so a
+slow tick or a changed system clock never accumulates into drift. How
+late each sample was taken relative to its target is recorded
+(p50/p95/max) along with ticks skipped entirely because the previous
+one overran or the system was suspended.
+"""
+import math
+import time
+import threading
+
+from profiler import StageStats
+
+# Longest single sleep before the wall clock is consulted again
+MAX_WAIT = 1.0
+
+
+class SampleScheduler:
+    """
+    Calls on_tick(target) at every multiple of `interval` seconds (Unix
+    time). on_tick returns the epoch its sample was actually acquired (or
+    None), and lateness is measured from that, so the stats describe the
+    samples rather than this thread's wake-ups. set_interval() changes the
+    period without restarting the phase: ticks stay on the boundaries.
+    """
+    def __init__(self, interval, on_tick, name="SampleClock"):
+        self.interval = float(interval)
+        self.on_tick = on_tick
+        self.name = name
+        self.lateness = StageStats()
+        self.missed = 0
+        self._target = None
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, first_after=0.0):
+        """First tick on the first boundary at least `first_after` seconds from now."""
+        if self._thread and self._thread.is_alive(): return
+        self._stop_event.clear()
+        self._target = self._next_boundary(time.time() + first_after)
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def set_interval(self, interval):
+        interval = float(interval)
+        if interval == self.interval: return
+        self.interval = interval
+        # Re-aim at the next boundary of the new period
+        self._wake.set()
+
+    def _next_boundary(self, wall):
+        return math.ceil(wall / self.interval) * self.interval
+
+    # --- LOOP ---
+    def _run(self):
+        while not self._stop_event.is_set():
+            if self._wake.is_set():
+                self._wake.clear()
+                self._target = self._next_boundary(time.time())
+            # Event.wait() sleeps on the monotonic clock; the remaining time is
+            # re-derived from the wall clock in slices, so an NTP step moves
+            # the deadline instead of stretching the wait
+            remaining = self._target - time.time()
+            if remaining > 0:
+                self._wake.wait(min(remaining, MAX_WAIT))
+                continue
+            now = time.time()
+            target = self._target
+            if now - target > self.interval:
+                # Overran or suspended: skip the ticks that are already past
+                skipped = int((now - target) // self.interval)
+                self.missed += skipped
+                target += skipped * self.interval
+            self._target = target + self.interval
+            acquired = None
+            try:
+                acquired = self.on_tick(target)
+            except Exception as e:
+                print(f"Error logging sample: {e}")
+            self.lateness.add(max(0.0, (acquired if acquired is not None else now) - target))
+
+    def stats(self):
+        """Lateness of recent ticks (ms) plus totals."""
+        summary = self.lateness.summary()
+        summary.update({'interval_s': self.interval, 'missed': self.missed})
+        return summary
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"Sample timing ({s['interval_s']:g}s): late p50 {s['p50_ms']:.1f} ms, "
+                f"p95 {s['p95_ms']:.1f} ms, max {s['max_ms']:.1f} ms, "
+                f"{s['count']} ticks, {s['missed']} missed")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+import math
+import time
+from bisect import bisect_left
+
+# Upper edges (seconds) of the read latency histogram; the last bucket is open-ended
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 2.0)
+
+# DS18B20 measuring range; 85.0 is the power-on reset value of the scratchpad
+MIN_VALID_C = -55.0
+MAX_VALID_C = 125.0
+POWER_ON_RESET_C = 85.0
+
+
+def validate_reading(temp_c):
+    """Returns None for a plausible reading, else the reason it is rejected."""
+    if temp_c is None or isinstance(temp_c, bool) or not isinstance(temp_c, (int, float)):
+        return "not a number"
+    if math.isnan(temp_c):
+        return "not a number"
+    if temp_c == POWER_ON_RESET_C:
+        return "power-on reset value (85 °C)"
+    if not MIN_VALID_C <= temp_c <= MAX_VALID_C:
+        return f"out of range ({temp_c} °C)"
+    return None
+
+
+# --- PER-SENSOR COUNTERS ---
+class SensorHealth:
+    """Read counters for one probe, O(1) per read."""
+    __slots__ = ('reads', 'errors', 'rejected', 'timeouts', 'retries', 'histogram',
+                 'latency_total', 'latency_max', 'last_good', 'last_error', 'consecutive_failures')
+
+    def __init__(self):
+        self.reads = 0          # Read attempts that ended in a result or a failure
+        self.errors = 0         # Exceptions / CRC / missing probe
+        self.rejected = 0       # Implausible values (85 °C, out of range)
+        self.timeouts = 0
+        self.retries = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.last_good = None   # Epoch of the last accepted reading
+        self.last_error = ""
+        self.consecutive_failures = 0
+
+    def record_ok(self, latency, epoch, retries=0):
+        self.reads += 1
+        self.retries += retries
+        self.histogram[bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.last_good = epoch
+        self.consecutive_failures = 0
+
+    def record_failure(self, kind, message, retries=0):
+        """kind: 'error', 'rejected' or 'timeout'."""
+        self.reads += 1
+        self.retries += retries
+        if kind == 'rejected':
+            self.rejected += 1
+        elif kind == 'timeout':
+            self.timeouts += 1
+        else:
+            self.errors += 1
+        self.last_error = message
+        self.consecutive_failures += 1
+
+    @property
+    def failures(self):
+        return self.errors + self.rejected + self.timeouts
+
+    @property
+    def error_rate(self):
+        return self.failures / self.reads if self.reads else 0.0
+
+    @property
+    def mean_latency(self):
+        good = self.reads - self.failures
+        return self.latency_total / good if good else 0.0
+
+    def age(self, now=None):
+        """Seconds since the last good reading, or None if there never was one."""
+        if self.last_good is None: return None
+        return (now if now is not None else time.time()) - self.last_good
+
+    def to_dict(self, now=None):
+        return {
+            'reads': self.reads, 'errors': self.errors, 'rejected': self.rejected,
+            'timeouts': self.timeouts, 'retries': self.retries,
+            'error_rate': self.error_rate,
+            'latency_mean': self.mean_latency, 'latency_max': self.latency_max,
+            'latency_buckets': list(LATENCY_BUCKETS),
+            'latency_histogram': list(self.histogram),
+            'last_good': self.last_good, 'last_good_age': self.age(now),
+            'last_error': self.last_error,
+        }
+
+
+def format_health(h, now=None):
+    """One-line summary for the settings screen from a SensorHealth.to_dict()."""
+    if not h or not h.get('reads'):
+        return "No reads yet"
+    # From last_good, so counters published by another process still age correctly
+    age = None
+    if h.get('last_good') is not None:
+        age = (now if now is not None else time.time()) - h['last_good']
+    age_txt = "never" if age is None else f"{age:.0f}s ago"
+    text = (f"{h['reads']} reads, {h['error_rate'] * 100:.1f}% failed, "
+            f"{h['latency_mean'] * 1000:.0f}/{h['latency_max'] * 1000:.0f} ms avg/max, "
+            f"last good {age_txt}")
+    if h.get('last_error') and h['error_rate'] > 0:
+        text += f" ({h['last_error']})"
+    return text
@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+import os
+import glob
+import math
+import time
+import threading
+from random import uniform
+
+from sensor_health import SensorHealth, validate_reading
+
+# A poll this close before a sample boundary still counts as taken on it
+POLL_SLOP = 0.05
+
+# --- SENSOR HANDLING ---
+class MockW1ThermSensor:
+    def __init__(self, sensor_id=None):
+        self.id = sensor_id or "28-00000TEST"
+    @staticmethod
+    def get_available_sensors():
+        return [MockW1ThermSensor("28-MockProd"), MockW1ThermSensor("28-MockAmb")]
+    def get_temperature(self):
+        return round(uniform(20.0, 30.0), 2)
+
+
+_backend = None
+
+
+def sensor_backend():
+    """
+    (sensor class, is_raspberry_pi). The w1thermsensor import and the bus
+    probe happen on first call rather than at import, off the startup path.
+    TEMPMONITOR_MOCK_SENSORS=1 forces the mock (benchmarks, development on a Pi).
+    """
+    global _backend
+    if _backend is None:
+        try:
+            if os.environ.get('TEMPMONITOR_MOCK_SENSORS', '') not in ('', '0'):
+                raise ImportError("Mock sensors requested")
+            from w1thermsensor import W1ThermSensor
+            if not W1ThermSensor.get_available_sensors():
+                raise ImportError("No sensors found")
+            _backend = (W1ThermSensor, True)
+        except Exception:
+            print("Using MOCK SENSORS")
+            _backend = (MockW1ThermSensor, False)
+    return _backend
+
+
+# --- BULK CONVERSION (w1_therm sysfs) ---
+W1_DEVICES_DIR = '/sys/bus/w1/devices'
+# DS18B20 worst-case conversion time per resolution (bits -> seconds)
+CONVERSION_TIME = {9: 0.094, 10: 0.188, 11: 0.375, 12: 0.750}
+
+
+def w1_device_name(sensor):
+    """
+    A probe's sysfs directory name (e.g. '28-0123456789ab'). w1thermsensor's
+    .id is the serial without the family prefix, so the name comes from its
+    sensor path (sensor_path in 2.x, sensorpath in 1.x) when it has one.
+    """
+    path = getattr(sensor, 'sensor_path', None) or getattr(sensor, 'sensorpath', None)
+    if path:
+        return os.path.basename(os.path.dirname(str(path)))
+    return sensor.id
+
+
+class BulkReader:
+    """
+    Starts one simultaneous conversion on every probe of every bus master
+    (writing 'trigger' to w1_bus_master*/therm_bulk_read), waits for it once,
+    then collects each probe's stored result from <device>/temperature.
+    N probes cost one conversion window instead of N.
+    base_dir can point at a fake sysfs tree for testing.
+    """
+    def __init__(self, base_dir=W1_DEVICES_DIR, resolution=None, poll_step=0.01):
+        self.base_dir = base_dir
+        self.resolution = resolution
+        self.poll_step = poll_step
+
+    def _masters(self):
+        return sorted(glob.glob(os.path.join(self.base_dir, 'w1_bus_master*', 'therm_bulk_read')))
+
+    def available(self):
+        """True if the kernel exposes therm_bulk_read (w1_therm with bulk support)."""
+        return bool(self._masters())
+
+    def set_resolution(self, sensors, bits):
+        """Writes 9-12 bit resolution to each probe (lower = faster conversion)."""
+        bits = int(bits)
+        if bits not in CONVERSION_TIME:
+            raise ValueError(f"Resolution must be 9-12 bits, got {bits}")
+        for sensor in sensors:
+            try:
+                with open(os.path.join(self.base_dir, w1_device_name(sensor), 'resolution'), 'w') as f:
+                    f.write(str(bits))
+            except OSError as e:
+                print(f"Error setting resolution on {sensor.id}: {e}")
+        self.resolution = bits
+
+    def _conversion_done(self, masters):
+        for path in masters:
+            try:
+                with open(path, 'r') as f:
+                    if f.read().strip() == '-1':
+                        return False
+            except OSError: pass
+        return True
+
+    def read_all(self, sensors):
+        """Triggers one conversion on all buses and returns [(sensor_id, temp_c)]."""
+        masters = self._masters()
+        for path in masters:
+            with open(path, 'w') as f:
+                f.write('trigger')
+        # Wait for every bus to finish, bounded by the worst-case conversion time
+        deadline = time.monotonic() + CONVERSION_TIME.get(self.resolution, 0.750) * 1.5
+        while not self._conversion_done(masters) and time.monotonic() < deadline:
+            time.sleep(self.poll_step)
+
+        # Probes that fail to answer are left out (the poller counts them as errors)
+        results = []
+        for sensor in sensors:
+            try:
+                with open(os.path.join(self.base_dir, w1_device_name(sensor), 'temperature'), 'r') as f:
+                    results.append((sensor.id, int(f.read().strip()) / 1000.0))
+            except (OSError, ValueError): pass
+        return results
+
+
+def make_bulk_reader(sensors, resolution=None, base_dir=W1_DEVICES_DIR):
+    """
+    Applies the probe resolution (9-12 bit) and returns a BulkReader if the
+    kernel supports therm_bulk_read on this bus, else None (parallel per-probe reads).
+    """
+    reader = BulkReader(base_dir, resolution=resolution)
+    if resolution:
+        try:
+            reader.set_resolution(sensors, resolution)
+        except ValueError as e:
+            print(f"Error setting sensor resolution: {e}")
+    return reader if reader.available() else None
+
+
+# --- ACQUISITION WORKER ---
+class ReadFailure(Exception):
+    """A probe read that failed after its retries. kind: 'error', 'rejected' or 'timeout'."""
+    def __init__(self, kind, message, retries=0):
+        super().__init__(message)
+        self.kind = kind
+        self.message = message
+        self.retries = retries
+
+
+class PendingRead:
+    """
+    One probe read on its own daemon thread. A pool's workers are joined
+    at interpreter exit, so a probe hung in the kernel would block
+    shutdown; a daemon thread is simply abandoned.
+    """
+    def __init__(self, fn, arg, name):
+        self._fn = fn
+        self._arg = arg
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+        threading.Thread(target=self._run, name=name, daemon=True).start()
+
+    def _run(self):
+        try:
+            self._result = self._fn(self._arg)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout):
+        """The read's return value; re-raises its exception, TimeoutError if still running."""
+        if not self._done.wait(timeout):
+            raise TimeoutError
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class SensorPoller:
+    """
+    Reads every probe on a background thread and publishes the latest
+    reading per sensor into a lock-protected snapshot.
+    The display refresh and the logger both read the snapshot, so one
+    physical 1-Wire conversion serves every consumer.
+    With a BulkReader, all probes convert at once; otherwise every probe is
+    read concurrently, each on its own daemon thread.
+
+    Read health:
+        read_timeout   a poll waits at most this long for the slowest probe;
+                       a probe still hung from an earlier poll is skipped
+        retries        extra attempts (exponential backoff) after an error or
+                       an implausible value such as the 85 °C power-on reset
+        max_backoff    probes failing repeatedly are polled less often, up to this
+    Rejected values never reach the snapshot; per-probe counters are in get_health().
+
+    Polls start on multiples of poll_interval (Unix time). With a
+    poll_interval that divides the log interval, every sample boundary is
+    also a poll boundary, and acquire() hands the logger that poll's result.
+    """
+    def __init__(self, sensors, poll_interval=2.0, on_update=None, bulk=None,
+                 read_timeout=1.5, retries=2, retry_backoff=0.05, max_backoff=60.0):
+        self.sensors = list(sensors)
+        self.poll_interval = poll_interval
+        self.on_update = on_update  # Called with a snapshot copy after each poll
+        self.bulk = bulk
+        self._no_bulk = set()  # Probes the bulk read gave no value for: read individually
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._snapshot = {}  # sensor_id -> (temp_c, epoch_seconds)
+        self._health = {s.id: SensorHealth() for s in self.sensors}
+        self._retry_at = {}   # sensor_id -> monotonic time of the next attempt (backoff)
+        self._inflight = {}   # sensor_id -> PendingRead that may still be hung
+        self._bulk_read = None  # PendingRead of the last bulk conversion
+        self._poll_started = float('-inf')  # Epoch the running (or last) poll started
+        self._last_poll = float('-inf')     # Start epoch of the last completed poll
+        self._last_poll_done = None         # ...and when it completed
+        self._polled = threading.Condition(self._lock)
+        self._wake = threading.Event()      # Poll now (acquire(), interval change, stop)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._threaded = False  # Probes read in parallel once started
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self._stop_event.clear()
+        self._threaded = True
+        self._thread = threading.Thread(target=self._run, name="SensorPoller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self._threaded = False
+
+    def set_poll_interval(self, seconds):
+        if seconds == self.poll_interval: return
+        self.poll_interval = seconds
+        self._wake.set()
+
+    def acquire(self, since, timeout):
+        """
+        Waits for a poll that started at or after epoch `since`, asking for
+        one if none is under way, and returns (snapshot, epoch the poll
+        completed). On timeout: the latest snapshot and None.
+        """
+        if not self.sensors or not self._thread:
+            return self.get_snapshot(), None
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._last_poll < since - POLL_SLOP:
+                if self._poll_started < since - POLL_SLOP:
+                    self._wake.set()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return dict(self._snapshot), None
+                self._polled.wait(remaining)
+            return dict(self._snapshot), self._last_poll_done
+
+    def get_snapshot(self):
+        """Returns a copy of {sensor_id: (temp_c, epoch_seconds)}."""
+        with self._lock:
+            return dict(self._snapshot)
+
+    def get_reading(self, sensor_id):
+        with self._lock:
+            return self._snapshot.get(sensor_id)
+
+    def get_health(self):
+        """{sensor_id: SensorHealth.to_dict()} for every probe."""
+        now = time.time()
+        with self._lock:
+            return {s_id: h.to_dict(now) for s_id, h in self._health.items()}
+
+    def poll_once(self):
+        """Starts a read on every probe at once and publishes the results."""
+        if not self.sensors: return
+        started = self._poll_started = time.time()
+        now_mono = time.monotonic()
+        due = [s for s in self.sensors if self._retry_at.get(s.id, 0.0) <= now_mono]
+        results = []
+        if self.bulk:
+            bulk_due = [s for s in due if s.id not in self._no_bulk]
+            bulk_results = self._read_bulk(bulk_due) if bulk_due else []
+            if bulk_results is not None:
+                results = bulk_results
+                # The rest (and probes the bulk read just gave up on) one by one
+                due = [s for s in due if s.id in self._no_bulk]
+        results += self._read_each(due)
+
+        now = time.time()
+        with self._lock:
+            for sensor_id, temp_c in results:
+                self._snapshot[sensor_id] = (temp_c, now)
+            snapshot = dict(self._snapshot)
+            self._last_poll = started
+            self._last_poll_done = now
+            self._polled.notify_all()
+        if self.on_update:
+            try:
+                self.on_update(snapshot)
+            except Exception as e:
+                print(f"Error in poller update hook: {e}")
+
+    # --- HEALTH BOOKKEEPING ---
+    def _record_ok(self, sensor_id, temp_c, latency, retries=0):
+        with self._lock:
+            self._health[sensor_id].record_ok(latency, time.time(), retries)
+        self._retry_at.pop(sensor_id, None)
+        return (sensor_id, temp_c)
+
+    def _record_failure(self, sensor_id, kind, message, retries=0):
+        with self._lock:
+            health = self._health[sensor_id]
+            health.record_failure(kind, message, retries)
+            failures = health.consecutive_failures
+        # Report the start of a failure streak, not every poll of it
+        if failures == 1:
+            print(f"Error reading sensor {sensor_id}: {message}")
+        # Back off a probe that keeps failing so it costs the healthy ones nothing
+        if failures >= 3:
+            delay = min(self.max_backoff, self.poll_interval * 2 ** (failures - 3))
+            self._retry_at[sensor_id] = time.monotonic() + delay
+
+    # --- READ PATHS ---
+    def _read_bulk(self, due):
+        started = time.monotonic()
+        pending = self._bulk_read
+        if pending is not None and not pending.done():
+            # Still stuck in an earlier conversion: its probes go stale meanwhile
+            for sensor in due:
+                self._record_failure(sensor.id, 'timeout', "previous bulk read still hung")
+            return []
+        try:
+            if self._threaded:
+                # Same deadline as a per-probe read; a hung sysfs write or read is abandoned
+                self._bulk_read = PendingRead(self.bulk.read_all, due, name="w1-bulk-read")
+                values = dict(self._bulk_read.result(timeout=self.read_timeout))
+            else:
+                values = dict(self.bulk.read_all(due))
+        except TimeoutError:
+            for sensor in due:
+                self._record_failure(sensor.id, 'timeout', f"no bulk result within {self.read_timeout}s")
+            return []
+        except OSError as e:
+            print(f"Bulk conversion failed, reading probes individually: {e}")
+            self.bulk = None
+            return None
+        latency = time.monotonic() - started
+        results = []
+        for sensor in due:
+            if sensor.id not in values:
+                # No temperature file for it: read this probe on its own from now on
+                print(f"No bulk result for sensor {sensor.id}, reading it individually")
+                self._no_bulk.add(sensor.id)
+                continue
+            temp_c = values[sensor.id]
+            reason = validate_reading(temp_c)
+            if reason is None:
+                results.append(self._record_ok(sensor.id, temp_c, latency))
+            else:
+                self._record_failure(sensor.id, 'rejected', reason)
+        return results
+
+    def _read_one(self, sensor):
+        """One probe with bounded retries; runs on a PendingRead thread."""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            t0 = time.monotonic()
+            try:
+                temp_c = sensor.get_temperature()
+                reason = validate_reading(temp_c)
+                if reason is None:
+                    return temp_c, time.monotonic() - t0, attempt
+                kind, message = 'rejected', reason
+            except Exception as e:
+                kind, message = 'error', str(e) or type(e).__name__
+            delay = self.retry_backoff * 2 ** attempt
+            if attempt >= self.retries or time.monotonic() - started + delay > self.read_timeout:
+                raise ReadFailure(kind, message, attempt)
+            time.sleep(delay)
+            attempt += 1
+
+    def _read_each(self, due):
+        results = []
+        if not self._threaded:
+            for sensor in due:
+                try:
+                    temp_c, latency, retries = self._read_one(sensor)
+                    results.append(self._record_ok(sensor.id, temp_c, latency, retries))
+                except ReadFailure as e:
+                    self._record_failure(sensor.id, e.kind, e.message, e.retries)
+            return results
+
+        reads = []
+        for sensor in due:
+            pending = self._inflight.get(sensor.id)
+            if pending is not None and not pending.done():
+                # Still stuck in an earlier read: don't pile up another thread
+                self._record_failure(sensor.id, 'timeout', "previous read still hung")
+                continue
+            read = PendingRead(self._read_one, sensor, name=f"w1-read-{sensor.id}")
+            self._inflight[sensor.id] = read
+            reads.append((sensor, read))
+
+        # One shared deadline: a slow probe delays the poll by at most read_timeout
+        deadline = time.monotonic() + self.read_timeout
+        for sensor, read in reads:
+            try:
+                temp_c, latency, retries = read.result(timeout=max(0.0, deadline - time.monotonic()))
+                results.append(self._record_ok(sensor.id, temp_c, latency, retries))
+            except TimeoutError:
+                self._record_failure(sensor.id, 'timeout', f"no answer within {self.read_timeout}s")
+            except ReadFailure as e:
+                self._record_failure(sensor.id, e.kind, e.message, e.retries)
+        return results
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.poll_once()
+            # Next poll on the next multiple of poll_interval, or when woken
+            now = time.time()
+            due = (math.floor(now / self.poll_interval) + 1) * self.poll_interval
+            self._wake.wait(due - now)
+            self._wake.clear()
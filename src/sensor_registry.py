@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+# Plot/card colors handed out in discovery order (first two match the old product/ambient colors)
+PALETTE = [
+    [1, 1, 0, 1],        # Yellow
+    [0, 1, 0, 1],        # Green
+    [0, 0.8, 1, 1],      # Cyan
+    [1, 0.4, 1, 1],      # Magenta
+    [1, 0.6, 0, 1],      # Orange
+    [1, 0.3, 0.3, 1],    # Red
+    [0.6, 0.6, 1, 1],    # Lavender
+    [1, 1, 1, 1],        # White
+]
+DEFAULT_NAMES = ["PRODUCT", "AMBIENT"]
+
+
+# --- SENSOR REGISTRY ---
+class SensorInfo:
+    __slots__ = ('id', 'name', 'color', 'show')
+
+    def __init__(self, sensor_id, name, color, show=True):
+        self.id = sensor_id
+        self.name = name
+        self.color = list(color)
+        self.show = show
+
+    def to_dict(self):
+        return {'name': self.name, 'color': self.color, 'show': self.show}
+
+
+class SensorRegistry:
+    """
+    Every known probe with its user-assigned name, color and visibility,
+    persisted as settings['sensor_map'] = {sensor_id: {name, color, show}}.
+    Order is the sensor_map order, with newly discovered probes appended.
+    """
+    def __init__(self, settings):
+        self.settings = settings
+        self._sensors = {}   # sensor_id -> SensorInfo (ordered)
+        self._active = []    # ids seen on the bus or in the log this session
+        for s_id, entry in (settings.get('sensor_map') or {}).items():
+            if not isinstance(entry, dict): continue
+            idx = len(self._sensors)
+            self._sensors[s_id] = SensorInfo(s_id,
+                                             entry.get('name') or self._default_name(idx),
+                                             entry.get('color') or PALETTE[idx % len(PALETTE)],
+                                             entry.get('show', True))
+
+    @staticmethod
+    def _default_name(idx):
+        return DEFAULT_NAMES[idx] if idx < len(DEFAULT_NAMES) else f"PROBE {idx + 1}"
+
+    def sync(self, sensor_ids):
+        """Registers probes from the bus/log. Returns True if the active set changed."""
+        added = False
+        for s_id in sensor_ids:
+            if s_id not in self._sensors:
+                idx = len(self._sensors)
+                self._sensors[s_id] = SensorInfo(s_id, self._default_name(idx),
+                                                 PALETTE[idx % len(PALETTE)])
+                added = True
+        active = [s_id for s_id in self._sensors if s_id in set(sensor_ids)]
+        changed = active != self._active
+        self._active = active
+        if added:
+            self.save()
+        return changed
+
+    def save(self):
+        self.settings.set('sensor_map', {s_id: info.to_dict() for s_id, info in self._sensors.items()})
+
+    def get(self, sensor_id):
+        return self._sensors.get(sensor_id)
+
+    def active_ids(self):
+        """Probes present this session, in display order."""
+        return list(self._active)
+
+    def visible_ids(self):
+        """Active probes the user has not hidden."""
+        return [s_id for s_id in self._active if self._sensors[s_id].show]
+
+    def name(self, sensor_id):
+        info = self._sensors.get(sensor_id)
+        return info.name if info else sensor_id
+
+    def color(self, sensor_id):
+        info = self._sensors.get(sensor_id)
+        return info.color if info else [1, 1, 1, 1]
+
+    def rename(self, sensor_id, name):
+        info = self._sensors.get(sensor_id)
+        if info is None or not name.strip(): return
+        info.name = name.strip()
+        self.save()
+
+    def cycle_color(self, sensor_id):
+        info = self._sensors.get(sensor_id)
+        if info is None: return
+        try:
+            idx = PALETTE.index(info.color)
+        except ValueError:
+            idx = -1
+        info.color = list(PALETTE[(idx + 1) % len(PALETTE)])
+        self.save()
+
+    def set_visible(self, sensor_id, show):
+        info = self._sensors.get(sensor_id)
+        if info is None: return
+        info.show = bool(show)
+        self.save()
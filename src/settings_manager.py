@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+import os
+import json
+import csv
+import time
+import shutil
+import threading
+
+import binary_log
+import sqlite_log
+
+# Bumped whenever stored settings need converting (see MIGRATIONS)
+SCHEMA_VERSION = 2
+# Changes are written this long after the last set() (slider drags coalesce)...
+SAVE_DELAY = 2.0
+# ...but never later than this after the first unsaved change
+SAVE_MAX_DELAY = 10.0
+
+
+# --- SCHEMA MIGRATIONS ---
+def _migrate_v1(data):
+    """v1 (unversioned): sensor_map entries may be bare names or junk."""
+    sensor_map = data.get('sensor_map')
+    if not isinstance(sensor_map, dict):
+        sensor_map = {}
+    migrated = {}
+    for s_id, entry in sensor_map.items():
+        if isinstance(entry, str):
+            entry = {'name': entry}
+        if isinstance(entry, dict):
+            migrated[str(s_id)] = entry
+    data['sensor_map'] = migrated
+    return data
+
+
+# version -> function upgrading a settings dict from that version to the next
+MIGRATIONS = {1: _migrate_v1}
+
+
+# --- SETTINGS MANAGER & CONFIGURATION ---
+class SettingsManager:
+    def __init__(self, data_dir=None):
+        self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        # data_dir override: benchmarks / scratch copies that must not touch data/
+        self.data_dir = data_dir or os.path.join(self.base_dir, 'data')
+        self.csv_file = os.path.join(self.data_dir, 'templog.csv')
+        self.bin_file = os.path.join(self.data_dir, 'templog.bin')
+        self.db_file = os.path.join(self.data_dir, 'templog.db')
+        self.rollup_dir = os.path.join(self.data_dir, 'rollups')
+        self.archive_dir = os.path.join(self.data_dir, 'archive')
+        self.settings_file = os.path.join(self.data_dir, 'tempmonitor_settings.json')
+        # Held by whichever process is logging (GUI or headless service)
+        self.lock_file = os.path.join(self.data_dir, 'logger.lock')
+        # Latest readings published by the headless service. Next to the lock
+        # file, so the logger and a viewer (any user, any session) agree on it
+        self.live_file = os.path.join(self.data_dir, 'tempmonitor_live.json')
+        self.health_file = os.path.join(self.data_dir, 'tempmonitor_health.json')
+        self.alerts_file = os.path.join(self.data_dir, 'tempmonitor_alerts.json')
+        self._loaded_mtime = None
+        self._lock = threading.Lock()
+        self._save_cond = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()  # One writer at a time (save() vs the saver thread)
+        self._generation = 0       # Bumped per snapshot, so an older one never overwrites a newer
+        self._written = 0
+        self._dirty_since = None   # Monotonic time of the first unsaved change
+        self._save_due = None
+        self._saver = None
+        self._file_version = SCHEMA_VERSION
+        
+        # Default Settings
+        self.defaults = {
+            'window_width': 480,
+            'window_height': 258,
+            'window_top': None,
+            'window_left': None,
+            'units': 'C',          # 'C' or 'F'
+            'frequency_unit': 'min', # 'sec' or 'min'
+            'log_interval': 5,     
+            'log_format': 'csv',   # 'csv', 'binary' or 'sqlite' (export with binary_log.py / sqlite_log.py)
+            'log_flush_rows': 20,      # Batched writer: flush after N queued rows...
+            'log_flush_seconds': 60,   # ...or at least every T seconds
+            'log_fsync': False,        # fsync on each flush (power-cut safe, more SD wear)
+            'log_rotation': 'weekly',  # 'daily', 'weekly' or 'off' (gzip segments in data/archive)
+            'log_rotate_mb': 50,       # Also rotate when the live log exceeds this size
+            'history_memory_mb': 64,   # RAM for samples (16 B each), stats windows and rollups; older samples are read back from disk (0 = no limit)
+            'w1_bulk_read': True,      # One simultaneous conversion for all probes (if the kernel supports it)
+            'w1_resolution': 12,       # Probe resolution 9-12 bit (9 bit ~0.1 s, 12 bit ~0.75 s per conversion)
+            'w1_read_timeout': 1.5,    # Seconds a poll waits for a slow/hung probe
+            'w1_read_retries': 2,      # Extra attempts after an error or implausible value
+            'profiling': False,        # Hot-path timings (Diagnostics tab); also TEMPMONITOR_PROFILE=1
+            'api_enabled': False,      # Local HTTP/SSE API (stream_api.py), logger process only
+            'api_host': '127.0.0.1',
+            'api_port': 8765,
+            'alerts': [],              # Alert rules (see alerts.py), evaluated by the logger process
+            'sensor_map': {}      
+        }
+        self.data = self.defaults.copy()
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.settings_file):
+            try:
+                self._loaded_mtime = os.path.getmtime(self.settings_file)
+                with open(self.settings_file, 'r') as f:
+                    saved = json.load(f)
+                if not isinstance(saved, dict):
+                    raise ValueError("not a JSON object")
+            except Exception as e:
+                print(f"Error loading settings: {e}")
+                self._keep_copy('corrupt')
+                return
+            saved = self._migrate(saved)
+            with self._lock:
+                self.data.update(self._validated(saved))
+
+    def _migrate(self, saved):
+        """Upgrades an older file step by step, keeping a copy of the original.
+        Keys this version does not know (from a newer one) are left alone."""
+        version = saved.get('schema_version', 1)
+        self._file_version = max(version, SCHEMA_VERSION)
+        if version >= SCHEMA_VERSION: return saved
+        self._keep_copy(f'v{version}')
+        while version < SCHEMA_VERSION:
+            saved = MIGRATIONS[version](saved)
+            version += 1
+        print(f"Settings migrated to schema version {version}.")
+        return saved
+
+    def _validated(self, saved):
+        """Drops stored values whose type no longer matches the default."""
+        result = {}
+        for key, value in saved.items():
+            default = self.defaults.get(key)
+            if default is not None and value is not None:
+                if isinstance(default, bool):
+                    ok = isinstance(value, bool)
+                elif isinstance(default, (int, float)):
+                    ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+                else:
+                    ok = isinstance(value, type(default))
+                if not ok:
+                    print(f"Ignoring invalid setting {key}={value!r}")
+                    continue
+            result[key] = value
+        return result
+
+    def _keep_copy(self, suffix):
+        try:
+            shutil.copy2(self.settings_file, f"{self.settings_file}.{suffix}")
+        except OSError: pass
+
+    def reload_if_changed(self):
+        """Re-reads the settings file if another process saved it. Returns True if reloaded."""
+        try:
+            mtime = os.path.getmtime(self.settings_file)
+        except OSError:
+            return False
+        if mtime == self._loaded_mtime: return False
+        self.load()
+        return True
+
+    # --- PERSISTENCE ---
+    def save(self):
+        """Writes the settings now (e.g. on exit), replacing any pending save."""
+        with self._lock:
+            self._dirty_since = self._save_due = None
+            snapshot = self._snapshot()
+        self._write(*snapshot)
+
+    def _snapshot(self):
+        # Caller holds self._lock
+        self._generation += 1
+        data = dict(self.data, schema_version=self._file_version)
+        return self._generation, json.dumps(data, indent=4)
+
+    def _write(self, generation, payload):
+        """Writes a snapshot unless a newer one already reached the disk."""
+        with self._write_lock:
+            if generation <= self._written: return
+            self._write_file(payload)
+            self._written = generation
+
+    def _write_file(self, payload):
+        """temp file + fsync + os.replace: a crash leaves the old or the new file, never half of one."""
+        # Caller holds self._write_lock
+        tmp = f"{self.settings_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.data_dir, exist_ok=True)
+            with open(tmp, 'w') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.settings_file)
+            # Make the rename itself durable
+            dir_fd = os.open(self.data_dir, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+            self._loaded_mtime = os.path.getmtime(self.settings_file)
+        except OSError as e:
+            print(f"Error saving settings: {e}")
+
+    def _schedule_save(self):
+        # Caller holds self._lock
+        now = time.monotonic()
+        if self._dirty_since is None:
+            self._dirty_since = now
+        self._save_due = min(now + SAVE_DELAY, self._dirty_since + SAVE_MAX_DELAY)
+        if self._saver is None:
+            self._saver = threading.Thread(target=self._save_loop, name="SettingsSaver", daemon=True)
+            self._saver.start()
+        self._save_cond.notify()
+
+    def _save_loop(self):
+        while True:
+            with self._lock:
+                while self._save_due is None or time.monotonic() < self._save_due:
+                    timeout = None if self._save_due is None else self._save_due - time.monotonic()
+                    self._save_cond.wait(timeout)
+                self._dirty_since = self._save_due = None
+                snapshot = self._snapshot()
+            self._write(*snapshot)
+
+    def get(self, key):
+        return self.data.get(key, self.defaults.get(key))
+
+    def set(self, key, value):
+        """Changes a setting; it is written to disk shortly after (debounced)."""
+        with self._lock:
+            if key in self.data and self.data[key] == value: return
+            self.data[key] = value
+            self._schedule_save()
+
+    @property
+    def log_file(self):
+        """Active log path for the selected log format"""
+        fmt = self.get('log_format')
+        if fmt == 'binary': return self.bin_file
+        if fmt == 'sqlite': return self.db_file
+        return self.csv_file
+
+    def ensure_data_dir(self):
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+        if not os.path.exists(self.log_file):
+            if self.log_file == self.db_file and os.path.exists(self.csv_file):
+                # First start on SQLite: bring the existing CSV history along (once)
+                print("Importing templog.csv into templog.db...")
+                rows = sqlite_log.import_csv(self.csv_file, self.db_file)
+                print(f"Imported {rows} rows.")
+                return
+            self.reset_log()
+
+    def reset_log(self):
+        """Creates an empty log (header only) in the selected format"""
+        if self.log_file == self.bin_file:
+            binary_log.create_log(self.bin_file)
+        elif self.log_file == self.db_file:
+            sqlite_log.create_log(self.db_file)
+        else:
+            with open(self.csv_file, 'w', newline='') as f:
+                csv.writer(f).writerow(['timestamp', 'sensor_id', 'temperature'])
+
+# Instantiate Global Manager
+settings = SettingsManager()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+SQLite temperature log (WAL mode), an optional alternative to templog.csv.
+
+Schema:
+    sensors  idx INTEGER PRIMARY KEY, sensor_id TEXT UNIQUE
+    samples  id INTEGER PRIMARY KEY (insertion order), sensor, ts, temp (°C)
+             + covering index samples_sensor_ts (sensor, ts, temp)
+
+The covering index keeps each sensor's samples contiguous and time-ordered,
+so a per-sensor range query never touches the table itself; the rowid
+gives readers a cheap "everything after id N" tail, the SQLite equivalent
+of the byte offset HistoryStore keeps for the CSV and binary logs.
+WAL lets a viewer read while the logger writes.
+
+Usage:
+    python sqlite_log.py export templog.db templog.csv
+    python sqlite_log.py import templog.csv templog.db
+"""
+import os
+import sys
+import csv
+import time
+import sqlite3
+from datetime import datetime
+
+DB_EXT = '.db'
+# Rough on-disk bytes per sample (row + index entry), to size progressive loads
+ROW_BYTES = 40
+# Checkpoints tried (busy readers) before a rotation gives up on moving the log
+CHECKPOINT_ATTEMPTS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sensors (idx INTEGER PRIMARY KEY, sensor_id TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS samples (id INTEGER PRIMARY KEY, sensor INTEGER NOT NULL,
+                                    ts REAL NOT NULL, temp REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS samples_sensor_ts ON samples (sensor, ts, temp);
+"""
+
+
+def is_sqlite_log(path):
+    return path.endswith(DB_EXT)
+
+
+# --- CONNECTION ---
+def connect(path, synchronous='NORMAL', timeout=5.0):
+    """
+    Opens (creating if needed) a log database in WAL mode. Autocommit
+    connection; writes use explicit transactions. synchronous=FULL syncs
+    every commit (the 'log_fsync' setting), NORMAL only at checkpoints.
+    """
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(f'PRAGMA synchronous={synchronous}')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def checkpoint(conn):
+    """Folds the WAL back into the main file. True if every frame made it
+    (no reader kept the checkpoint busy) and the WAL was truncated."""
+    busy, log, done = conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+    return busy == 0 and log == done
+
+
+def close(conn):
+    """Checkpoints (best effort) and closes."""
+    try:
+        checkpoint(conn)
+    except sqlite3.Error: pass
+    conn.close()
+
+
+def fold_wal(path, attempts=CHECKPOINT_ATTEMPTS, wait=0.2):
+    """
+    Checkpoints a log until its WAL is empty, so the .db alone holds every
+    sample and can be moved. Raises sqlite3.OperationalError if readers
+    keep the checkpoint from completing.
+    """
+    # Short busy timeout: this runs under the history lock during a rotation
+    conn = connect(path, timeout=wait)
+    try:
+        for _ in range(attempts):
+            if checkpoint(conn): return
+            time.sleep(wait)
+    finally:
+        conn.close()
+    raise sqlite3.OperationalError(f"WAL of {path} still busy after {attempts} checkpoints")
+
+
+def remove_log(path):
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError: pass
+
+
+def create_log(path):
+    """Creates (or replaces) an empty log, dropping any stale WAL of an old file."""
+    remove_log(path)
+    close(connect(path))
+
+
+def sensor_table(conn):
+    """{idx: sensor_id}"""
+    return dict(conn.execute('SELECT idx, sensor_id FROM sensors'))
+
+
+# --- WRITE ---
+def append_records(conn, records):
+    """
+    Inserts (epoch, sensor_id, temp_c) tuples in one transaction.
+    New sensor ids get a row in the sensors table. Returns rows inserted.
+    """
+    if not records: return 0
+    index = {s_id: idx for idx, s_id in sensor_table(conn).items()}
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for s_id in {r[1] for r in records} - index.keys():
+            index[s_id] = conn.execute('INSERT INTO sensors (sensor_id) VALUES (?)', (s_id,)).lastrowid
+        conn.executemany('INSERT INTO samples (sensor, ts, temp) VALUES (?, ?, ?)',
+                         [(index[s_id], epoch, temp_c) for epoch, s_id, temp_c in records])
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return len(records)
+
+
+# --- READ ---
+def last_id(conn):
+    return conn.execute('SELECT MAX(id) FROM samples').fetchone()[0] or 0
+
+
+def first_epoch(conn):
+    row = conn.execute('SELECT ts FROM samples ORDER BY id LIMIT 1').fetchone()
+    return row[0] if row else None
+
+
+def read_records(conn, after=0, max_records=None):
+    """
+    Rows inserted after rowid `after` (at most `max_records` of them), in
+    insertion order. Returns (sensor_table, [(ts, idx, temp_c)], new_after).
+    """
+    names = sensor_table(conn)
+    rows = conn.execute('SELECT id, ts, sensor, temp FROM samples WHERE id > ? ORDER BY id LIMIT ?',
+                        (after, -1 if max_records is None else max_records)).fetchall()
+    if not rows:
+        return names, [], after
+    return names, [r[1:] for r in rows], rows[-1][0]
+
+
+def read_range(conn, t0, t1, sensor_ids=None):
+    """
+    {sensor_id: (ts list, temps list)} for t0 <= epoch <= t1, one index
+    range scan per sensor (optionally only `sensor_ids`).
+    """
+    result = {}
+    for idx, s_id in sensor_table(conn).items():
+        if sensor_ids is not None and s_id not in sensor_ids: continue
+        rows = conn.execute('SELECT ts, temp FROM samples WHERE sensor = ? AND ts BETWEEN ? AND ? '
+                            'ORDER BY ts', (idx, t0, t1)).fetchall()
+        if rows:
+            result[s_id] = ([r[0] for r in rows], [r[1] for r in rows])
+    return result
+
+
+def iter_rows(conn):
+    """Yields (epoch, sensor_id, temp_c) for every sample in insertion order."""
+    names = sensor_table(conn)
+    for ts, idx, temp_c in conn.execute('SELECT ts, sensor, temp FROM samples ORDER BY id'):
+        yield ts, names[idx], temp_c
+
+
+# --- CONVERSION ---
+def export_csv(db_path, csv_path):
+    """Writes the database in the classic templog.csv layout."""
+    count = 0
+    conn = connect(db_path)
+    try:
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['timestamp', 'sensor_id', 'temperature'])
+            for epoch, sensor_id, temp_c in iter_rows(conn):
+                writer.writerow([datetime.fromtimestamp(round(epoch, 3)).isoformat(' ', 'milliseconds'),
+                                 sensor_id, round(temp_c, 3)])
+                count += 1
+    finally:
+        close(conn)
+    return count
+
+
+def import_csv(csv_path, db_path, batch_size=50000):
+    """
+    One-time conversion of an existing templog.csv into a new database.
+    Built under a temporary name and moved into place when complete, so an
+    interrupted import is simply redone.
+    """
+    tmp = db_path + '.importing'
+    create_log(tmp)
+    conn = connect(tmp, synchronous='OFF')
+    count = 0
+    batch = []
+    try:
+        with open(csv_path, 'r', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if len(row) < 3: continue
+                try:
+                    epoch = datetime.fromisoformat(row[0]).timestamp()
+                    batch.append((epoch, row[1], float(row[2])))
+                except ValueError: continue
+                if len(batch) >= batch_size:
+                    count += append_records(conn, batch)
+                    batch = []
+        count += append_records(conn, batch)
+    finally:
+        close(conn)
+    remove_log(db_path)
+    os.replace(tmp, db_path)
+    return count
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4 or sys.argv[1] not in ('export', 'import'):
+        print(__doc__)
+        sys.exit(1)
+    mode, src, dst = sys.argv[1:]
+    if mode == 'export':
+        n = export_csv(src, dst)
+    else:
+        n = import_csv(src, dst)
+    print(f"{mode}: {n} rows written to {dst}")
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Local read-only HTTP API for live readings and history (localhost only).
+
+    GET /api/latest                        latest reading per sensor
+    GET /api/sensors                       known sensor ids
+    GET /api/stats?sensor=ID               all-time / 1 h / 24 h statistics
+    GET /api/profile                       hot-path timings (when profiling is enabled)
+    GET /api/health                        per-sensor read counters, latency histogram, last good age
+    GET /api/alerts                        active alerts (rules with a 'banner' action)
+    GET /api/timing                        sampling lateness vs. interval boundaries (ms), missed ticks
+    GET /api/history?sensor=ID&start=EPOCH&end=EPOCH&resolution=raw|60|900|3600|auto&points=N
+    GET /api/stream                        server-sent events, one 'sample' event per logged row
+
+Temperatures are always °C. Every client gets its own bounded queue, so a
+slow or stalled client never blocks acquisition or other clients.
+"""
+import json
+import math
+import time
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from decimate import minmax_decimate, visible_slice
+from profiler import profiler
+
+
+# --- FAN-OUT ---
+class Broadcaster:
+    """Non-blocking fan-out of events to any number of subscriber queues."""
+    def __init__(self, max_queue=1000):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def client_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # Slow client: drop its oldest event rather than block the logger
+                try:
+                    q.get_nowait()
+                    q.put_nowait(event)
+                except (queue.Empty, queue.Full): pass
+
+
+# --- QUERIES ---
+def query_history(service, sensor_id, t0, t1, resolution='auto', points=None):
+    """
+    History for one sensor between t0 and t1 (°C).
+    Raw rows are [epoch, temp_c]; rollup rows are [start, min, mean, max, count].
+    """
+    if resolution == 'auto':
+        resolution = service.rollups.pick_tier(t0, t1, points or 500) or 'raw'
+
+    if resolution == 'raw':
+        # Memory, plus evicted samples paged back from the live log
+        xs, ys = service.history.read_window(sensor_id, t0, t1)
+        lo, hi = visible_slice(xs, t0, t1)
+        ts, temps = xs[lo:hi], ys[lo:hi]
+        live_start = service.history.live_start(sensor_id)
+        if live_start is None: live_start = t1
+        if t0 < live_start:
+            # Older than the live log: only the archive segments overlapping the range
+            ats, atemps = service.archive.read_range(sensor_id, t0, live_start)
+            ts, temps = ats + ts, atemps + temps
+        if points:
+            pts = minmax_decimate(ts, temps, t0, t1, max(1, points // 2))
+        else:
+            pts = zip(ts, temps)
+        return 'raw', [[x, y] for x, y in pts if t0 <= x <= t1]
+
+    bucket = int(resolution)
+    rollup = service.rollups.get(bucket, sensor_id)
+    if rollup is None:
+        return bucket, []
+    lo, hi = visible_slice(rollup.starts, t0, t1)
+    rows = [[rollup.starts[i], rollup.mins[i], rollup.mean(i), rollup.maxs[i], int(rollup.counts[i])]
+            for i in range(lo, hi) if t0 - bucket < rollup.starts[i] <= t1]
+    return bucket, rows
+
+
+def stats_summary(service, sensor_id):
+    result = {}
+    for window in (None,) + service.stats.windows:
+        st = service.stats.get(sensor_id, window)
+        if st is None: continue
+        result['all' if window is None else f"{window}s"] = {
+            'count': st.count, 'min': st.min, 'max': st.max,
+            'mean': st.mean if st.count else None, 'stdev': st.stdev,
+        }
+    return result
+
+
+# --- HTTP ---
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "TempMonitorAPI/1.0"
+
+    def log_message(self, fmt, *args):
+        pass  # Keep the console for app messages
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        api = self.server.api
+        url = urlparse(self.path)
+        args = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            if url.path == '/api/latest':
+                snap = api.service.get_snapshot()
+                self._send_json({s_id: {'temp_c': t, 'ts': ts} for s_id, (t, ts) in snap.items()})
+            elif url.path == '/api/sensors':
+                self._send_json(api.service.sensor_ids)
+            elif url.path == '/api/profile':
+                self._send_json({'enabled': profiler.enabled, 'stages': profiler.summary()})
+            elif url.path == '/api/health':
+                self._send_json(api.service.get_health())
+            elif url.path == '/api/alerts':
+                self._send_json(api.service.get_alerts())
+            elif url.path == '/api/timing':
+                self._send_json(api.service.get_timing())
+            elif url.path == '/api/stats':
+                self._send_json(stats_summary(api.service, args.get('sensor')))
+            elif url.path == '/api/history':
+                now = time.time()
+                t1 = float(args.get('end', now))
+                t0 = float(args.get('start', t1 - 3600))
+                if not (math.isfinite(t0) and math.isfinite(t1)):
+                    raise ValueError("start and end must be finite epochs")
+                points = int(args['points']) if 'points' in args else None
+                res, rows = query_history(api.service, args.get('sensor'), t0, t1,
+                                          args.get('resolution', 'auto'), points)
+                self._send_json({'sensor': args.get('sensor'), 'resolution': res, 'rows': rows})
+            elif url.path == '/api/stream':
+                self._stream(api)
+            else:
+                self._send_json({'error': 'not found'}, 404)
+        except (ValueError, KeyError, OverflowError) as e:
+            self._send_json({'error': str(e)}, 400)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _stream(self, api):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        q = api.broadcaster.subscribe()
+        try:
+            while not api.stopping.is_set():
+                try:
+                    event = q.get(timeout=api.heartbeat)
+                    self.wfile.write(f"event: sample\ndata: {json.dumps(event)}\n\n".encode('utf-8'))
+                except queue.Empty:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            api.broadcaster.unsubscribe(q)
+
+
+class StreamServer:
+    """Threaded localhost HTTP/SSE server over a LoggerService."""
+    def __init__(self, service, host='127.0.0.1', port=8765, heartbeat=15.0):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.heartbeat = heartbeat
+        self.broadcaster = Broadcaster()
+        self.stopping = threading.Event()
+        self._httpd = None
+        self._thread = None
+
+    def publish_rows(self, rows):
+        """Listener for LoggerService: one SSE event per logged row."""
+        for epoch, sensor_id, temp_c in rows:
+            self.broadcaster.publish({'sensor': sensor_id, 'ts': epoch, 'temp_c': temp_c})
+
+    def start(self):
+        self.stopping.clear()
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.api = self
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="StreamAPI", daemon=True)
+        self._thread.start()
+        print(f"Local API listening on http://{self.host}:{self.port}/api/")
+
+    def stop(self):
+        self.stopping.set()
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None